@@ -0,0 +1,252 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import argparse
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks import synthetic
+from mtss_maps import codes, display, fuzzy, matching, perf, pipeline, reference, render, templates
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Stages timed for each pipeline, in the order they run
+MAP_MAKER_STAGES = ('ingest', 'normalize', 'merge', 'serialize', 'build_map', 'export_html', 'export')
+MATCHMAKER_STAGES = ('ingest', 'normalize', 'match', 'suggest', 'export')
+
+# Download of each Code Matchmaker page: its file type, the columns it keeps (None for
+# every column) and whether the codes are re-padded first, as on the District page
+MATCHMAKER_EXPORTS = {
+    'district': ('xlsx', None, True),
+    'isd': ('csv', None, False),
+    'psa': ('csv', ('PSA', 'PSA Code'), False),
+    'school': ('csv', ('School', 'School Code'), False),
+}
+
+# Slowdown against a baseline run that counts as a regression
+TOLERANCE = 1.25
+
+# Stages faster than this in both runs are too short to compare reliably
+MIN_COMPARED_SECONDS = 0.005
+
+#------------------------------------------------------------------------
+# Timing
+#------------------------------------------------------------------------
+
+# Collects the wall time of named stages, plus an optional output size per stage
+class Stages:
+    def __init__(self):
+        self.seconds = {}
+        self.bytes = {}
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        yield
+        self.seconds[stage] = time.perf_counter() - start
+
+#------------------------------------------------------------------------
+# Pipelines
+#------------------------------------------------------------------------
+
+# The Map Maker page steps, through the functions the page calls with the page's map target:
+# pipeline.read_upload, combine, create_map and the HTML and PNG downloads, one stage each
+def map_maker(entity, path):
+    spec = pipeline.MAP_MAKERS[entity]
+    stages = Stages()
+    data = path.read_bytes()
+    spans = perf.start(benchmark='map_maker')
+    with stages.time('ingest'):
+        df = pipeline.read_upload(io.BytesIO(data), entity, path.name)
+    # read_upload normalizes the codes of what it reads; that step is reported as its own stage
+    stages.seconds['normalize'] = sum(span['seconds'] for span in spans if span['stage'] == 'normalize')
+    stages.seconds['ingest'] -= stages.seconds['normalize']
+    with stages.time('merge'):
+        combined, _, _ = pipeline.combine(entity, df)
+    with stages.time('serialize'):
+        stages.bytes['serialize'] = len(json.dumps(pipeline.layer_features(entity, combined, 'live')))
+    with stages.time('build_map'):
+        view = display.view_html(pipeline.create_map(entity, combined, 'live'))
+        stages.bytes['build_map'] = len(view)
+    with stages.time('export_html'):
+        html = templates.export_html(entity, combined) if spec['kind'] == 'boundary' else view
+        stages.bytes['export_html'] = len(html)
+    with stages.time('export'):
+        png = io.BytesIO()
+        render.save_figure(pipeline.create_figure(entity, combined), png, 'png')
+        stages.bytes['export'] = png.tell()
+    return stages
+
+# The Code Matchmaker page steps: read the whole upload, strip the names, look the codes
+# up, suggest names for the unmatched rows and write the page's download
+def matchmaker(entity, path):
+    _, name_column, code_column = matching.CODE_TABLES[entity]
+    file_type, columns, repad = MATCHMAKER_EXPORTS[entity]
+    stages = Stages()
+    with stages.time('ingest'):
+        df = pd.read_csv(path) if path.suffix == '.csv' else pd.read_excel(path)
+    with stages.time('normalize'):
+        df[name_column] = df[name_column].str.strip()
+    with stages.time('match'):
+        index = matching.load_name_index(entity)
+        df[code_column] = index.lookup(df[name_column])
+        index.ambiguous_in(df[name_column])
+    with stages.time('suggest'):
+        fuzzy.suggest_matches(entity, df.loc[df[code_column].isnull(), name_column])
+    with stages.time('export'):
+        if repad:
+            df[code_column] = codes.format_codes(codes.code_keys(df[code_column])[0], width=0).fillna('')
+        exported = df[list(columns)] if columns else df
+        if file_type == 'xlsx':
+            output = io.BytesIO()
+            with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                exported.to_excel(writer, index=False)
+            stages.bytes['export'] = output.tell()
+        else:
+            stages.bytes['export'] = len(exported.to_csv(index=False))
+    return stages
+
+PIPELINES = {
+    'map_maker': (map_maker, MAP_MAKER_STAGES),
+    'matchmaker': (matchmaker, MATCHMAKER_STAGES),
+}
+
+# Load every reference layer and index once, so the stages time uploads rather than cold caches
+def warm(entity):
+    pipeline.warm(entity, 'live', figures=True)
+    if pipeline.MAP_MAKERS[entity]['kind'] == 'boundary':
+        templates.load_template(entity)
+    matching.load_name_index(entity)
+    fuzzy.load_trigram_index(entity)
+    # The first XLSX written in a process pays for importing the writer
+    if MATCHMAKER_EXPORTS[entity][0] == 'xlsx':
+        with pd.ExcelWriter(io.BytesIO(), engine='openpyxl') as writer:
+            pd.DataFrame({'warm': [1]}).to_excel(writer, index=False)
+
+#------------------------------------------------------------------------
+# Runs
+#------------------------------------------------------------------------
+
+# Entity and row count of a synthetic upload, from its file name (district_10000.csv)
+def _describe(path):
+    entity, rows = path.stem.rsplit('_', 1)
+    return entity, int(rows)
+
+# Time every pipeline on every upload, keeping the fastest of the repeats of each stage
+def run(uploads, pipelines=tuple(PIPELINES), repeat=1):
+    results = []
+    warmed = {}
+    for path in uploads:
+        entity, rows = _describe(path)
+        if entity not in warmed:
+            start = time.perf_counter()
+            warm(entity)
+            warmed[entity] = time.perf_counter() - start
+            results.append({'pipeline': 'reference', 'entity': entity, 'upload': None, 'rows': None, 'stage': 'load', 'seconds': round(warmed[entity], 6), 'bytes': None})
+
+        for name in pipelines:
+            function, stage_names = PIPELINES[name]
+            runs = [function(entity, path) for _ in range(repeat)]
+            for stage in stage_names:
+                results.append({
+                    'pipeline': name,
+                    'entity': entity,
+                    'upload': path.name,
+                    'rows': rows,
+                    'stage': stage,
+                    'seconds': round(min(stages.seconds[stage] for stages in runs), 6),
+                    'bytes': runs[0].bytes.get(stage),
+                })
+            print(f"{name:<10} {path.name:<24} " + '  '.join(f"{stage} {min(r.seconds[stage] for r in runs):.3f}s" for stage in stage_names), file=sys.stderr, flush=True)
+    return results
+
+# Where and on what the benchmarks ran, so results from different releases can be told apart
+def metadata(repeat):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=reference.ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'repeat': repeat,
+    }
+
+# Stages slower than in a baseline run by more than the tolerance
+def regressions(results, baseline, tolerance=TOLERANCE):
+    key = lambda row: (row['pipeline'], row['entity'], row['upload'], row['stage'])
+    before = {key(row): row['seconds'] for row in baseline['results']}
+    slower = []
+    for row in results:
+        old = before.get(key(row))
+        if old is None or max(old, row['seconds']) < MIN_COMPARED_SECONDS:
+            continue
+        ratio = row['seconds'] / old if old else float('inf')
+        if ratio > tolerance:
+            slower.append({**row, 'baseline_seconds': old, 'ratio': round(ratio, 2)})
+    return slower
+
+def main():
+    parser = argparse.ArgumentParser(description='Time every stage of the Map Maker and Code Matchmaker pipelines on synthetic uploads.')
+    parser.add_argument('--uploads', type=Path, default=Path('benchmarks/uploads'), help='directory of synthetic uploads, generated when missing (default: benchmarks/uploads)')
+    parser.add_argument('--sizes', default=','.join(map(str, synthetic.SIZES)), help='row counts of the uploads to generate and run')
+    parser.add_argument('--entities', default=','.join(pipeline.MAP_MAKERS), help='comma-separated entity types')
+    parser.add_argument('--pipelines', default=','.join(PIPELINES), help='comma-separated pipelines: map_maker, matchmaker')
+    parser.add_argument('--format', choices=('csv', 'xlsx'), default='csv', help='upload file type (XLSX only exists for small sizes)')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per upload; the fastest time of each stage is kept')
+    parser.add_argument('--out', type=Path, help='write the JSON results to this file instead of standard output')
+    parser.add_argument('--compare', type=Path, help='baseline results to compare against; exits 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help=f'slowdown ratio counted as a regression (default: {TOLERANCE})')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    entities = [entity.strip() for entity in args.entities.split(',')]
+    pipelines = [name.strip() for name in args.pipelines.split(',')]
+    unknown = [name for name in pipelines if name not in PIPELINES] + [entity for entity in entities if entity not in pipeline.MAP_MAKERS]
+    if unknown:
+        parser.error(f"unknown pipeline(s) or entity type(s): {', '.join(unknown)}")
+
+    uploads = []
+    for entity in entities:
+        for rows in sizes:
+            path = args.uploads / f'{entity}_{rows}.{args.format}'
+            if not path.exists():
+                args.uploads.mkdir(parents=True, exist_ok=True)
+                upload = synthetic.make_upload(entity, rows)
+                if args.format == 'csv':
+                    upload.to_csv(path, index=False)
+                else:
+                    upload.to_excel(path, index=False)
+            uploads.append(path)
+
+    report = {'meta': metadata(args.repeat), 'results': run(uploads, pipelines, args.repeat)}
+    if args.compare:
+        report['regressions'] = regressions(report['results'], json.loads(args.compare.read_text()), args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text)
+    else:
+        print(text)
+
+    for row in report.get('regressions', []):
+        print(f"REGRESSION {row['pipeline']} {row['upload']} {row['stage']}: {row['baseline_seconds']:.3f}s -> {row['seconds']:.3f}s ({row['ratio']}x)", file=sys.stderr)
+    sys.exit(1 if report.get('regressions') else 0)
+
+if __name__ == '__main__':
+    main()
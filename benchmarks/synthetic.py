@@ -0,0 +1,117 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from mtss_maps import matching, pipeline, reference
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Upload sizes generated by default, in rows
+SIZES = (100, 10_000, 1_000_000)
+
+# Share of rows whose name matches nothing, and the number of distinct such names
+UNMATCHED_SHARE = 0.05
+UNMATCHED_NAMES = 500
+
+# Share of names with trailing spaces, as exports from other systems often have
+PADDED_NAME_SHARE = 0.1
+
+# Ways a code is written in the wild, picked uniformly: plain, zero-padded, as a
+# float, as an Excel text formula and with a leading apostrophe
+CODE_STYLES = ('plain', 'padded', 'float', 'formula', 'apostrophe')
+
+# Largest upload written as XLSX; bigger ones are only written as CSV
+MAX_XLSX_ROWS = 10_000
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Names that look like real ones but match nothing: a letter dropped or doubled
+def _unmatched_names(names, count, rng):
+    picked = rng.choice(names, size=min(count, len(names)), replace=False)
+    result = []
+    for name in picked:
+        position = int(rng.integers(1, max(len(name), 2)))
+        if rng.random() < 0.5:
+            result.append(name[:position - 1] + name[position:])
+        else:
+            result.append(name[:position] + name[position - 1:])
+    return np.array(result, dtype=object)
+
+# Codes written in one of the CODE_STYLES per row
+def _styled_codes(code_values, rng):
+    code_values = pd.Series(code_values).astype(str).str.lstrip('0').replace('', '0')
+    styles = rng.choice(CODE_STYLES, size=len(code_values))
+    padded = code_values.str.zfill(5)
+    return np.select(
+        [styles == 'padded', styles == 'float', styles == 'formula', styles == 'apostrophe'],
+        [padded, code_values + '.0', '="' + padded + '"', "'" + padded],
+        default=code_values,
+    ).astype(object)
+
+# Synthetic upload of an entity drawn from its code table: names and codes sampled with
+# replacement (so names repeat), codes in mixed styles, some names padded with spaces and
+# a share of names that match nothing. Map Maker uploads also get a numeric value column.
+def make_upload(entity, rows, seed=0):
+    _, name_column, code_column = matching.CODE_TABLES[entity]
+    rng = np.random.default_rng(seed)
+    table = matching.load_code_table(entity).dropna()
+    picks = rng.integers(0, len(table), size=rows)
+    names = table[name_column].to_numpy(dtype=object)[picks]
+    code_values = table[code_column].to_numpy()[picks]
+
+    unmatched = rng.random(rows) < UNMATCHED_SHARE
+    if unmatched.any():
+        pool = _unmatched_names(table[name_column].to_numpy(dtype=object), UNMATCHED_NAMES, rng)
+        names[unmatched] = rng.choice(pool, size=int(unmatched.sum()))
+    padded = rng.random(rows) < PADDED_NAME_SHARE
+    names[padded] = [name + '  ' for name in names[padded]]
+
+    return pd.DataFrame({
+        name_column: names,
+        code_column: _styled_codes(code_values, rng),
+        'Enrollment': rng.integers(0, 5000, size=rows),
+    })
+
+# Entities that have a code table to draw uploads from
+def entities():
+    return [entity for entity in pipeline.MAP_MAKERS if (reference.ROOT / matching.CODE_TABLES[entity][0]).exists()]
+
+# Write the synthetic uploads of every entity and size as CSV (and XLSX for small sizes)
+def write_uploads(out_dir, sizes=SIZES, seed=0):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for entity in entities():
+        for rows in sizes:
+            upload = make_upload(entity, rows, seed)
+            path = out_dir / f'{entity}_{rows}.csv'
+            upload.to_csv(path, index=False)
+            written.append(path)
+            if rows <= MAX_XLSX_ROWS:
+                path = out_dir / f'{entity}_{rows}.xlsx'
+                upload.to_excel(path, index=False)
+                written.append(path)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description='Write synthetic uploads drawn from the code tables.')
+    parser.add_argument('--out', type=Path, default=Path('benchmarks/uploads'), help='output directory (default: benchmarks/uploads)')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help='comma-separated row counts')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for path in write_uploads(args.out, [int(size) for size in args.sizes.split(',')], args.seed):
+        print(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+#------------------------------------------------------------------------
+# MTSS Maps shared modules
+#------------------------------------------------------------------------
+
+# Code shared by the Map Maker and Code Matchmaker pages lives in this package
+# so that every page loads reference data and builds maps the same way.
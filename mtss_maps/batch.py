@@ -0,0 +1,140 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from mtss_maps import pipeline, render, templates
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Spreadsheet types picked up from an input directory
+EXTENSIONS = ('.csv', '.xlsx')
+
+# Per-file report written next to the outputs
+REPORT = 'batch_report.csv'
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Spreadsheets named by the inputs: directories are searched for CSV/XLSX
+# files, and any other file is a manifest listing one spreadsheet per line
+def collect_inputs(inputs):
+    files = []
+    for item in map(Path, inputs):
+        if item.is_dir():
+            files.extend(sorted(path for path in item.iterdir() if path.suffix.lower() in EXTENSIONS))
+        elif item.suffix.lower() in EXTENSIONS:
+            files.append(item)
+        else:
+            for line in item.read_text().splitlines():
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    path = Path(line)
+                    files.append(path if path.is_absolute() else item.parent / path)
+    return files
+
+# Output directory of each spreadsheet, named after the file and made unique
+def output_dirs(files, out_dir):
+    dirs, seen = [], {}
+    for path in files:
+        count = seen.get(path.stem, 0)
+        seen[path.stem] = count + 1
+        dirs.append(Path(out_dir) / (path.stem if count == 0 else f'{path.stem}_{count + 1}'))
+    return dirs
+
+# Load the reference data once per worker, before its first file, with the HTML template
+# of boundary maps when HTML maps are written
+def _warm(entity, formats):
+    pipeline.warm(entity, 'html', any(format != 'html' for format in formats))
+    if 'html' in formats and pipeline.MAP_MAKERS[entity]['kind'] == 'boundary':
+        templates.load_template(entity)
+
+# Result of a spreadsheet that failed, for the report
+def _failed(error, seconds=0):
+    return {'rows': '', 'included': '', 'unmatched': '', 'invalid': '', 'error': f'{type(error).__name__}: {error}', 'seconds': seconds}
+
+# Process one spreadsheet and time it; failures are reported rather than raised
+def _process(source, entity, out_dir, formats):
+    start = time.perf_counter()
+    try:
+        result = pipeline.run(source, entity, out_dir, formats)
+        result['error'] = ''
+    except Exception as error:
+        result = _failed(error)
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+# Generate the maps of many spreadsheets in a pool of worker processes. Each
+# worker loads the reference data once, before its first file. A worker that
+# dies, or fails to load the reference data, fails the files it was given; the
+# other files are still reported.
+def run_batch(entity, files, out_dir, workers=None, formats=('html',)):
+    dirs = output_dirs(files, out_dir)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_warm, initargs=(entity, formats)) as pool:
+        futures = {pool.submit(_process, str(path), entity, str(target), formats): i for i, (path, target) in enumerate(zip(files, dirs))}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool as error:
+                # A worker died or could not load the reference data; the pool fails every file left
+                result = _failed(error)
+            except Exception as error:
+                result = _failed(error)
+            yield {'file': str(files[i]), 'output': str(dirs[i]), **result}
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate Map Maker maps and match lists for many spreadsheets.')
+    parser.add_argument('entity', help=f"entity type of the spreadsheets: {', '.join(pipeline.MAP_MAKERS)}")
+    parser.add_argument('inputs', nargs='+', help='directories of CSV/XLSX files, spreadsheets, or manifest files listing one spreadsheet per line')
+    parser.add_argument('--out', type=Path, default=Path('maps'), help='output directory (default: maps)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes (default: one per CPU)')
+    parser.add_argument('--formats', default='html', help=f"comma-separated map formats: html, {', '.join(render.FORMATS)} (default: html)")
+    args = parser.parse_args()
+
+    if args.entity not in pipeline.MAP_MAKERS:
+        parser.error(f'unknown entity: {args.entity}')
+    formats = tuple(format.strip().lower() for format in args.formats.split(',') if format.strip())
+    unknown = [format for format in formats if format != 'html' and format not in render.FORMATS]
+    if unknown or not formats:
+        parser.error(f"unknown format(s): {', '.join(unknown) or args.formats}")
+    files = collect_inputs(args.inputs)
+    if not files:
+        parser.error('no spreadsheets found')
+
+    start = time.perf_counter()
+    rows = []
+    for result in run_batch(args.entity, files, args.out, args.workers, formats):
+        rows.append(result)
+        if result['error']:
+            print(f"FAILED {result['file']} ({result['seconds']:.2f}s): {result['error']}", flush=True)
+        else:
+            invalid = f" ({result['invalid']} with an invalid code)" if result['invalid'] else ''
+            print(f"ok     {result['file']} ({result['seconds']:.2f}s): {result['included']} included, {result['unmatched']} unmatched{invalid}", flush=True)
+
+    # Report in input order
+    order = {str(path): i for i, path in enumerate(files)}
+    rows.sort(key=lambda row: order[row['file']])
+    args.out.mkdir(parents=True, exist_ok=True)
+    with open(args.out / REPORT, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['file', 'output', 'rows', 'included', 'unmatched', 'invalid', 'seconds', 'error'])
+        writer.writeheader()
+        writer.writerows(rows)
+
+    failed = sum(1 for row in rows if row['error'])
+    print(f'{len(rows) - failed} of {len(rows)} files done in {time.perf_counter() - start:.1f}s; report written to {args.out / REPORT}')
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
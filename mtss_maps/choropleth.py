@@ -0,0 +1,152 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import branca.colormap
+import numpy as np
+import pandas as pd
+from branca.element import MacroElement
+from jinja2 import Template
+from matplotlib.colors import to_hex, to_rgb
+
+from mtss_maps import codes
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Presence column added to every upload; coloring by it shows matched versus unmatched
+PRESENCE = 'Count'
+
+# Ways to cut a numeric column into classes
+METHODS = {
+    'quantile': 'Quantile',
+    'equal_interval': 'Equal interval',
+    'breaks': 'Custom breaks',
+}
+
+# Default number of classes for the quantile and equal-interval methods
+CLASSES = 5
+
+# Feature property holding the class of each feature
+CLASS_PROPERTY = 'class'
+
+# Style of the features that matched nothing in the upload (class 0)
+UNMATCHED_STYLE = {'fillColor': 'white', 'color': 'black', 'weight': 0.15, 'fillOpacity': 0.25, 'lineOpacity': 0.4}
+MATCHED_OPACITY = 0.7
+
+# Lightest shade of a palette, as a share of the entity color mixed into white
+LIGHTEST = 0.2
+
+#------------------------------------------------------------------------
+# Classification
+#------------------------------------------------------------------------
+
+# Class of every feature of a combined layer and the style of every class.
+# Class 0 is "not in the upload"; classes 1..k are the value classes.
+class Classification:
+    def __init__(self, classes, edges, colors, value_column):
+        self.classes = classes
+        self.edges = edges
+        self.colors = colors
+        self.value_column = value_column
+
+    # Style per class, with the unmatched style first
+    @property
+    def styles(self):
+        return [UNMATCHED_STYLE] + [{**UNMATCHED_STYLE, 'fillColor': color, 'fillOpacity': MATCHED_OPACITY} for color in self.colors]
+
+    # Fill color and opacity per class, with the unmatched class first
+    @property
+    def fills(self):
+        return [(style['fillColor'], style['fillOpacity']) for style in self.styles]
+
+    # Class of each code in the upload, for styling features joined by code
+    def by_code(self, code_values):
+        matched = self.classes > 0
+        return dict(zip(pd.Series(code_values).to_numpy()[matched].tolist(), self.classes[matched].tolist()))
+
+    # Stepped color scale for a map legend, or None when coloring by presence only
+    def legend(self):
+        if self.value_column == PRESENCE:
+            return None
+        return branca.colormap.StepColormap(self.colors, index=list(self.edges), vmin=self.edges[0], vmax=self.edges[-1], caption=self.value_column)
+
+# Class boundaries of a numeric column: k + 1 increasing edges from the lowest to the highest value
+def class_edges(values, method='quantile', k=CLASSES, breaks=None):
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.array([0.0, 0.0])
+    low, high = values.min(), values.max()
+
+    if method == 'quantile':
+        edges = np.quantile(values, np.linspace(0, 1, k + 1))
+    elif method == 'equal_interval':
+        edges = np.linspace(low, high, k + 1)
+    elif method == 'breaks':
+        inner = np.asarray(sorted(breaks or []), dtype=float)
+        edges = np.concatenate([[low], inner[(inner > low) & (inner < high)], [high]])
+    else:
+        raise ValueError(f'Unknown classification method: {method}')
+
+    # Classes that would be empty are merged; a single value still makes one class
+    edges = np.unique(edges)
+    return edges if len(edges) > 1 else np.repeat(edges, 2)
+
+# Palette of k shades from light to the full entity color
+def palette(color, k):
+    rgb = np.array(to_rgb(color))
+    shares = np.linspace(LIGHTEST, 1, k) if k > 1 else np.ones(1)
+    return [to_hex(1 - share * (1 - rgb)) for share in shares]
+
+# Classify the features of a combined layer in one vectorized pass over a value column.
+# Features missing from the upload (Count != 1) get class 0.
+def classify(combined, color, value_column=PRESENCE, method='quantile', k=CLASSES, breaks=None):
+    matched = (combined[PRESENCE] == 1).to_numpy()
+    if value_column == PRESENCE:
+        classes = matched.astype(np.int8)
+        return Classification(classes, np.array([1.0, 1.0]), [color], value_column)
+
+    values = pd.to_numeric(combined[value_column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    values[~matched] = np.nan
+    edges = class_edges(values, method, k, breaks)
+    classes = np.searchsorted(edges[1:-1], values, side='right') + 1
+    classes[np.isnan(values)] = 0
+    return Classification(classes.astype(np.int8), edges, palette(color, len(edges) - 1), value_column)
+
+# Numeric columns of an upload that can be mapped, besides the presence count.
+# Columns without a single value would classify into one empty class, so they are left out.
+def value_columns(df, exclude=()):
+    numeric = df.select_dtypes('number').columns
+    return [column for column in numeric if column not in (PRESENCE, codes.KEY, *exclude) and df[column].notna().any()]
+
+# GeoJSON of a combined layer carrying only the given properties and the class of each feature.
+# Returned as a dict, which folium embeds without parsing it again.
+def class_geojson(combined, classification, properties):
+    layer = combined[[*properties, combined.geometry.name]].copy()
+    layer[CLASS_PROPERTY] = classification.classes
+    return {'type': 'FeatureCollection', 'features': list(layer.iterfeatures(drop_id=True))}
+
+#------------------------------------------------------------------------
+# Map element
+#------------------------------------------------------------------------
+
+# Styles a GeoJson layer from a table of class styles, looked up by each feature's
+# class property in the browser, instead of embedding a style per feature
+class ClassStyles(MacroElement):
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }} = {{ this.styles|tojson }};
+        {{ this._parent.get_name() }}.options.style = function(feature) {
+            return {{ this.get_name() }}[feature.properties.{{ this.property }}] || {{ this.get_name() }}[0];
+        };
+        {{ this._parent.get_name() }}.setStyle({{ this._parent.get_name() }}.options.style);
+        {% endmacro %}
+    """)
+
+    def __init__(self, styles, property=CLASS_PROPERTY):
+        super().__init__()
+        self._name = 'ClassStyles'
+        self.styles = styles
+        self.property = property
@@ -0,0 +1,89 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Column holding the integer code key that reference layers and uploads are joined on
+KEY = 'code_key'
+
+# Width codes are padded to for display
+CODE_WIDTH = 5
+
+# Largest code that fits the compact key type
+MAX_CODE = np.iinfo(np.int32).max
+
+# Excel text markers (="00123", '00123), thousands separators and spaces around a code
+_MARKUP = r'^\s*=?["\']?|["\']\s*$|[,\s]'
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Convert a column of codes to compact integer keys in one vectorized pass.
+# Handles ints, floats ("123.0"), padded strings ("00123"), thousands
+# separators, scientific notation and Excel text markers (="00123", '00123).
+# Alphanumeric codes such as '64M000009' or 'CCRESA-EC' get negative keys from a checksum
+# of their text. Text holding a digit, or made of hyphenated words, is an alphanumeric code;
+# other text ('TBD', 'NA') is not a code. Returns the keys as a nullable Int32 series and a
+# boolean mask of valid rows; invalid rows, blank ones included, have a missing key.
+def code_keys(codes):
+    values = pd.to_numeric(codes, errors='coerce').astype('float64').to_numpy()
+    alphanumeric = np.zeros(len(values), dtype=bool)
+
+    # Only clean up the text of codes that did not parse as numbers
+    retry = np.isnan(values) & codes.notna().to_numpy()
+    if retry.any():
+        cleaned = pd.Series(codes.to_numpy()[retry]).astype('string')
+        cleaned = cleaned.str.replace(_MARKUP, '', regex=True)
+        parsed = pd.to_numeric(cleaned, errors='coerce').astype('float64')
+
+        code_like = cleaned.str.contains(r'\d') | cleaned.str.fullmatch(r'[A-Za-z]+(?:-[A-Za-z]+)+')
+        text = (parsed.isna() & cleaned.str.fullmatch(r'[A-Za-z0-9-]*[A-Za-z][A-Za-z0-9-]*') & code_like).to_numpy(dtype=bool, na_value=False)
+        if text.any():
+            upper = cleaned[text].str.upper()
+            checksums = {value: -(zlib.crc32(value.encode()) % MAX_CODE) - 1 for value in upper.unique()}
+            parsed[text] = upper.map(checksums).astype('float64')
+            alphanumeric[np.flatnonzero(retry)[text]] = True
+
+        values[retry] = parsed.to_numpy()
+
+    # Only whole, non-negative numbers in range (or alphanumeric codes) are valid codes
+    with np.errstate(invalid='ignore'):
+        valid = alphanumeric | ((values % 1 == 0) & (values >= 0) & (values <= MAX_CODE))
+    keys = pd.Series(np.where(valid, values, np.nan), index=codes.index).astype('Int32')
+    return keys, valid
+
+# Raise ValueError when different alphanumeric codes of a reference table share a key.
+# Their keys are checksums, which can collide; colliding codes would silently join to
+# each other's boundaries. Called when reference tables are read from their source files.
+def check_keys(codes, keys, table):
+    alphanumeric = (keys < 0).to_numpy(dtype=bool, na_value=False)
+    text = codes[alphanumeric].astype('string').str.replace(_MARKUP, '', regex=True).str.upper()
+    distinct = pd.DataFrame({'key': keys[alphanumeric].to_numpy(), 'code': text.to_numpy()}).drop_duplicates()
+    clashes = distinct[distinct['key'].duplicated(keep=False)]
+    if not clashes.empty:
+        raise ValueError(f"Codes {', '.join(sorted(clashes['code']))} of {table} have the same code key, so they cannot be told apart when joining.")
+
+# Padded code strings for display, from numeric integer keys
+def format_codes(keys, width=CODE_WIDTH):
+    text = keys.astype('string')
+    if width:
+        text = text.str.zfill(width)
+    return text.astype(object).where(keys >= 0, None)
+
+# Add the integer key column to a frame and rewrite its code column as padded strings.
+# Alphanumeric and invalid codes are kept as uploaded, and blank codes as <NA>.
+# Returns the mask of valid rows.
+def normalize_codes(df, code_column):
+    keys, valid = code_keys(df[code_column])
+    df[KEY] = keys
+    df[code_column] = format_codes(keys).where(keys >= 0, df[code_column].astype('string').astype(object))
+    return valid
@@ -0,0 +1,97 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import pandas as pd
+import streamlit as st
+import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from mtss_maps import perf, warmup
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Size of the on-screen maps
+MAP_WIDTH = 725
+MAP_HEIGHT = 700
+
+# Map events sent back to the page when events are turned on: only clicks, never pans or zooms
+MAP_EVENTS = ['last_object_clicked_tooltip']
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Run a section of a page as its own unit, so its widgets rerun only that section
+fragment = st.fragment
+
+# Show a cached map. By default the pre-rendered HTML is shown as is: nothing is
+# sent back to the server, so panning and zooming never rerun the page.
+# With events on, the map is shown through st_folium and clicks return the clicked tooltip.
+# st_folium (and the folium plugins it loads) is only imported when events are turned on.
+def show_map(maps, events=False, key=None):
+    if not events:
+        components.html(maps['view'], width=MAP_WIDTH, height=MAP_HEIGHT)
+        return None
+    from streamlit_folium import st_folium
+    return st_folium(maps['map'], width=MAP_WIDTH, height=MAP_HEIGHT, returned_objects=MAP_EVENTS, key=key)
+
+# Rendered HTML of a folium map, for show_map and the HTML downloads
+def view_html(m):
+    with perf.span('render_html') as record:
+        html = m.get_root().render()
+        record['bytes'] = len(html)
+    return html
+
+#------------------------------------------------------------------------
+# Performance
+#------------------------------------------------------------------------
+
+# Start timing the stages of this run of a page; every span logged carries the page and session
+def start_spans(page):
+    ctx = get_script_run_ctx()
+    return perf.start(page=page, session=ctx.session_id if ctx else None)
+
+# Stop the page early, as st.stop() does, after showing the performance panel of this
+# run, so runs that end on an error or warning are timed too
+def stop(spans):
+    perf_panel(spans)
+    st.stop()
+
+# Optional sidebar panel with the stages of this run: wall time, rows and payload bytes of
+# each (nested stages are indented), and the state of the upload cache
+def perf_panel(spans):
+    if not st.sidebar.toggle('Performance'):
+        return
+
+    total = sum(span.get('seconds', 0) for span in spans if span.get('depth') == 0)
+    st.sidebar.write(f'Stages of this run: {total:.2f}s')
+    if spans:
+        details = lambda span: ', '.join(f'{key} {value}' for key, value in span.items() if key not in ('stage', 'seconds', 'depth', 'rows', 'bytes'))
+        table = pd.DataFrame({
+            'Stage': ['\u00a0\u00a0' * span.get('depth', 0) + span['stage'] for span in spans],
+            'Seconds': [span.get('seconds') for span in spans],
+            'Rows': pd.array([span.get('rows') for span in spans], dtype='Int64'),
+            'Bytes': pd.array([span.get('bytes') for span in spans], dtype='Int64'),
+            'Details': [details(span) for span in spans],
+        })
+        st.sidebar.dataframe(table, hide_index=True)
+
+    report = warmup.status()
+    if report['state'] != 'off':
+        st.sidebar.caption(f"Warm-up: {report['state']}, {report['done']} of {report['steps']} steps" + (f" in {report['seconds']:.1f}s" if report['seconds'] is not None else ''))
+
+    # Reference layers and the tables and indexes derived from them, cached for the process
+    from mtss_maps import reference
+    layers = reference.layer_memory_usage()
+    st.sidebar.caption(f"Reference cache: {len(layers)} entries, {sum(layers.values()) / 1024 / 1024:.1f} MB")
+
+    # The upload cache lives with the mapping modules, imported once a map has been made
+    from mtss_maps import uploads
+    stats = uploads.cache.stats()
+    st.sidebar.caption(
+        f"Upload cache: {stats['entries']} entries, {stats['bytes'] / 1024 / 1024:.1f} of {stats['max_bytes'] / 1024 / 1024:.0f} MB, "
+        f"{stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions"
+    )
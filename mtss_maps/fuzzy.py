@@ -0,0 +1,161 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from mtss_maps import matching, perf, reference
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Number of suggestions per unmatched name and the lowest similarity worth showing
+TOP_K = 3
+MIN_SCORE = 0.3
+
+# Upper bound on the query x name score matrix built per batch
+MAX_BATCH_CELLS = 4_000_000
+
+# Trigrams found in more names than this ("sch", "ool", ...) are counted with a
+# dense matrix product rather than by walking their long posting lists
+DENSE_POSTINGS = 64
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Lowercase names and turn punctuation into single spaces before cutting trigrams
+def normalize_names(names):
+    names = pd.Series(names, dtype=object).fillna('').astype(str)
+    return names.str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+
+# Distinct trigrams of a name, padded so that word starts and ends count
+def _trigrams(name):
+    padded = f'  {name} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+#------------------------------------------------------------------------
+# Trigram index
+#------------------------------------------------------------------------
+
+# Inverted index from trigrams to the names containing them. Similarity is
+# the Dice coefficient of the two trigram sets: 2 * shared / (|a| + |b|).
+class TrigramIndex:
+    def __init__(self, names, codes):
+        self.names = names.to_numpy(dtype=object)
+        self.codes = codes.to_numpy(dtype=object)
+
+        grams = [_trigrams(name) for name in normalize_names(names)]
+        self._sizes = np.array([len(g) for g in grams], dtype=np.float32)
+
+        # Flat (trigram, name) pairs sorted by trigram give CSR posting lists
+        vocabulary = {}
+        gram_ids = np.array([vocabulary.setdefault(g, len(vocabulary)) for gs in grams for g in gs], dtype=np.int64)
+        name_ids = np.repeat(np.arange(len(grams)), [len(g) for g in grams])
+        order = np.argsort(gram_ids, kind='stable')
+        frequency = np.bincount(gram_ids, minlength=len(vocabulary))
+        self._vocabulary = vocabulary
+        self._postings = name_ids[order].astype(np.int32)
+        self._offsets = np.concatenate([[0], np.cumsum(frequency)])
+
+        # Common trigrams get a column in a dense (trigram x name) indicator matrix
+        common = np.flatnonzero(frequency > DENSE_POSTINGS)
+        self._dense_column = np.full(len(vocabulary), -1, dtype=np.int64)
+        self._dense_column[common] = np.arange(len(common))
+        self._dense = np.zeros((len(common), len(grams)), dtype=np.float32)
+        is_common = self._dense_column[gram_ids] >= 0
+        self._dense[self._dense_column[gram_ids[is_common]], name_ids[is_common]] = 1
+
+    # Number of names sharing each trigram with each query, as a dense (queries x names) matrix
+    def _shared(self, query_grams):
+        query_ids, gram_ids = [], []
+        for position, grams in enumerate(query_grams):
+            known = [self._vocabulary[g] for g in grams if g in self._vocabulary]
+            query_ids.extend([position] * len(known))
+            gram_ids.extend(known)
+        query_ids = np.array(query_ids, dtype=np.int64)
+        gram_ids = np.array(gram_ids, dtype=np.int64)
+
+        # Common trigrams: one matrix product for the whole batch
+        columns = self._dense_column[gram_ids]
+        common = columns >= 0
+        queries = np.zeros((len(query_grams), len(self._dense)), dtype=np.float32)
+        queries[query_ids[common], columns[common]] = 1
+        dense_shared = queries @ self._dense
+        query_ids, gram_ids = query_ids[~common], gram_ids[~common]
+
+        # Rare trigrams: expand every (query, trigram) pair into the names on its posting list
+        starts = self._offsets[gram_ids]
+        lengths = self._offsets[gram_ids + 1] - starts
+        total = int(lengths.sum())
+        jumps = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        hits = self._postings[jumps + np.arange(total)]
+
+        cells = np.repeat(query_ids, lengths) * len(self.names) + hits
+        dense_shared += np.bincount(cells, minlength=dense_shared.size).reshape(dense_shared.shape)
+        return dense_shared
+
+    # Top-k most similar names for every query, in one batched pass.
+    # Returns one row per suggestion: query position, rank, name, code and score.
+    def search(self, queries, k=TOP_K, min_score=MIN_SCORE):
+        query_grams = [_trigrams(name) for name in normalize_names(queries)]
+        query_sizes = np.array([len(g) for g in query_grams], dtype=np.float32)
+        k = min(k, len(self.names))
+        batch = max(1, MAX_BATCH_CELLS // max(len(self.names), 1))
+
+        results = []
+        for begin in range(0, len(query_grams), batch):
+            end = begin + batch
+            scores = self._shared(query_grams[begin:end])
+            scores *= 2
+            scores /= query_sizes[begin:end, None] + self._sizes[None, :]
+
+            # Best k names per query, ordered by descending score and then by table order
+            best = np.argpartition(scores, -k, axis=1)[:, -k:]
+            best_scores = np.take_along_axis(scores, best, axis=1)
+            order = np.lexsort((best, -best_scores))
+            best = np.take_along_axis(best, order, axis=1)
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+
+            results.append(pd.DataFrame({
+                'query': np.repeat(np.arange(begin, begin + len(best)), k),
+                'rank': np.tile(np.arange(1, k + 1), len(best)),
+                'name': self.names[best.ravel()],
+                'code': self.codes[best.ravel()],
+                'score': best_scores.ravel(),
+            }))
+
+        if not results:
+            return pd.DataFrame(columns=['query', 'rank', 'name', 'code', 'score'])
+        suggestions = pd.concat(results, ignore_index=True)
+        return suggestions[suggestions['score'] >= min_score].reset_index(drop=True)
+
+    def memory_usage(self):
+        arrays = self._postings.nbytes + self._offsets.nbytes + self._sizes.nbytes + self._dense.nbytes + self._dense_column.nbytes
+        return int(arrays + len(self._vocabulary) * 100)
+
+# Load the trigram index for a code table once per process
+def load_trigram_index(entity):
+    def build():
+        _, name_column, code_column = matching.CODE_TABLES[entity]
+        table = matching.load_code_table(entity)
+        return TrigramIndex(table[name_column], table[code_column])
+
+    return reference.load_derived('trigrams', entity, build)
+
+# Suggested matches for a column of unmatched names, with the uploaded name first.
+# Each distinct name is searched once, however often it repeats in the upload.
+def suggest_matches(entity, names, k=TOP_K, min_score=MIN_SCORE):
+    _, name_column, code_column = matching.CODE_TABLES[entity]
+    distinct = pd.Series(names.dropna().unique(), dtype=object)
+    index = load_trigram_index(entity)
+    with perf.span('suggest', entity=entity, rows=len(distinct)):
+        suggestions = index.search(distinct, k=k, min_score=min_score)
+    return pd.DataFrame({
+        f'Uploaded {name_column}': distinct.to_numpy()[suggestions['query'].to_numpy(dtype=int)],
+        'Suggestion': suggestions['name'],
+        code_column: suggestions['code'].astype(str),
+        'Similarity': suggestions['score'].round(2),
+    })
@@ -0,0 +1,189 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import os
+from numbers import Number
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from mtss_maps import perf
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Largest upload read, in rows and megabytes; larger files are refused with an UploadTooLarge error
+MAX_ROWS = int(os.environ.get('MTSS_UPLOAD_MAX_ROWS', 1_000_000))
+MAX_MEGABYTES = int(os.environ.get('MTSS_UPLOAD_MAX_MB', 200))
+
+# Rows parsed at a time from a CSV upload
+CHUNK_ROWS = 50_000
+
+# Rows of a CSV upload sampled to find the other columns that hold numbers
+SAMPLE_ROWS = 1_000
+
+#------------------------------------------------------------------------
+# Errors
+#------------------------------------------------------------------------
+
+# An upload over the row or size limit. A ValueError, so pages report it like any other bad upload.
+class UploadTooLarge(ValueError):
+    pass
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# File type of an upload from its name, or ValueError for anything but CSV and XLSX
+def _file_type(source, filename):
+    filename = str(filename or source)
+    if filename.endswith('.csv'):
+        return 'csv'
+    if filename.endswith('.xlsx'):
+        return 'xlsx'
+    raise ValueError('Unsupported file format. Please upload a CSV or XLSX file.')
+
+# Size of an upload in bytes, from a file object or a path
+def _size(source):
+    if hasattr(source, 'getbuffer'):
+        return source.getbuffer().nbytes
+    if hasattr(source, 'seek'):
+        position = source.seek(0, os.SEEK_END)
+        source.seek(0)
+        return position
+    return os.path.getsize(source)
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+def _check_size(source):
+    if _size(source) > MAX_MEGABYTES * 1024 * 1024:
+        raise UploadTooLarge(f'The uploaded file is larger than {MAX_MEGABYTES} MB. Please upload a smaller file or split it into several files.')
+
+def _check_rows(rows):
+    if rows > MAX_ROWS:
+        raise UploadTooLarge(f'The uploaded file has more than {MAX_ROWS:,} rows. Please upload a smaller file or split it into several files.')
+
+# Column names of a worksheet header row, named like pandas names them
+def _header(values):
+    return [value if value is not None else f'Unnamed: {i}' for i, value in enumerate(values)]
+
+def _open_workbook(source):
+    _rewind(source)
+    return openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+# Column names of every sheet of an upload, read without loading any data rows.
+# Returns a list of (sheet name, columns); a CSV is a single sheet named None.
+def read_headers(source, filename=None):
+    file_type = _file_type(source, filename)
+    _check_size(source)
+    if file_type == 'csv':
+        _rewind(source)
+        return [(None, list(pd.read_csv(source, nrows=0).columns))]
+
+    workbook = _open_workbook(source)
+    try:
+        headers = []
+        for sheet in workbook.worksheets:
+            first = next(sheet.iter_rows(max_row=1, values_only=True), ())
+            headers.append((sheet.title, _header(first)))
+        return headers
+    finally:
+        workbook.close()
+
+# Read only the given columns of one sheet of an upload (the first by default), streaming
+# CSV files in chunks and workbooks row by row. Text columns are read as strings, as
+# pandas would read them with dtype=str. With numeric=True every other column that holds
+# only numbers, and at least one, is kept too, so it can be mapped; other columns are
+# dropped as they stream by.
+# Raises UploadTooLarge when the upload is over the row or size limit.
+def read_columns(source, filename, columns, sheet=None, text_columns=(), numeric=False):
+    file_type = _file_type(source, filename)
+    _check_size(source)
+    with perf.span('read', format=file_type, bytes=_size(source)) as record:
+        if file_type == 'csv':
+            df = _read_csv_columns(source, columns, text_columns, numeric)
+        else:
+            df = _read_xlsx_columns(source, columns, sheet, text_columns, numeric)
+        record['rows'] = len(df)
+    return df
+
+def _read_csv_columns(source, columns, text_columns, numeric):
+    dtype = {column: str for column in text_columns}
+    extra = []
+    if numeric:
+        # Columns a small sample parses as numbers are the only other columns read
+        _rewind(source)
+        sample = pd.read_csv(source, dtype=dtype, nrows=SAMPLE_ROWS)
+        extra = [column for column in sample.columns if column not in columns and pd.api.types.is_numeric_dtype(sample[column])]
+        del sample
+
+    _rewind(source)
+    chunks, rows, filled = [], 0, set()
+    for chunk in pd.read_csv(source, usecols=[*columns, *extra], dtype=dtype, chunksize=CHUNK_ROWS):
+        rows += len(chunk)
+        _check_rows(rows)
+        # Keep the other columns only while every chunk parses them as numbers
+        extra = [column for column in extra if pd.api.types.is_numeric_dtype(chunk[column])]
+        filled.update(column for column in extra if chunk[column].notna().any())
+        chunks.append(chunk[[*columns, *extra]])
+
+    # Columns without a single number, such as empty unnamed columns, are dropped
+    extra = [column for column in extra if column in filled]
+    if not chunks:
+        return pd.DataFrame(columns=list(columns))
+    return pd.concat(chunks, ignore_index=True)[[*columns, *extra]]
+
+def _read_xlsx_columns(source, columns, sheet, text_columns, numeric):
+    workbook = _open_workbook(source)
+    try:
+        worksheet = workbook[sheet] if sheet is not None else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = _header(next(rows, ()))
+        positions = {column: header.index(column) for column in columns}
+        extra = {column: i for i, column in enumerate(header) if column not in positions} if numeric else {}
+        values = {column: [] for column in [*positions, *extra]}
+        filled = set()
+
+        count = 0
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            count += 1
+            _check_rows(count)
+            for column, i in positions.items():
+                values[column].append(row[i] if i < len(row) else None)
+            # Drop a column as soon as it holds anything but numbers
+            for column, i in list(extra.items()):
+                value = row[i] if i < len(row) else None
+                if value is not None and (isinstance(value, bool) or not isinstance(value, Number)):
+                    del extra[column]
+                    del values[column]
+                else:
+                    values[column].append(value)
+                    if value is not None:
+                        filled.add(column)
+    finally:
+        workbook.close()
+
+    # Columns without a single number, such as empty unnamed columns, are dropped
+    for column in [column for column in extra if column not in filled]:
+        del extra[column]
+        del values[column]
+
+    for column in text_columns:
+        values[column] = [_text(value) if value is not None else np.nan for value in values[column]]
+    df = pd.DataFrame({column: pd.Series(column_values, dtype=object) for column, column_values in values.items()})
+    for column in extra:
+        df[column] = pd.to_numeric(df[column])
+    return df
+
+# Cell value as text, writing whole-number floats without their decimals like pandas does
+def _text(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
@@ -0,0 +1,291 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import io
+from pathlib import Path
+
+import streamlit as st
+
+# Only the page shell is imported up front. The mapping modules (pandas, geopandas, folium,
+# matplotlib) are imported once a file is uploaded, or ahead of that by the warm-up.
+from mtss_maps import display, registry, warmup
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Repository root, which the example spreadsheets are found from
+ROOT = Path(__file__).resolve().parent.parent
+
+# MIME type of the example workbooks
+XLSX_MIME = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+#------------------------------------------------------------------------
+# Page parts
+#------------------------------------------------------------------------
+
+# Title, header and the contact toggle shared by the Map Maker pages
+def page_header(subtitle):
+    st.title('MTSS:grey[.ai]')
+    st.header(f'Map Maker:grey[ | {subtitle}]')
+
+    contact = st.sidebar.toggle('Handmade by  \n**LeVesseur** :grey[ PhD]  \n| :grey[MTSS.ai]')
+    if contact:
+        st.sidebar.write('Inquiries: [info@mtss.ai](mailto:info@mtss.ai)  \nProfile: [levesseur.com](http://levesseur.com)  \nCheck out: [InkQA | Dynamic PDFs](http://www.inkqa.com)')
+
+# Download button for an example spreadsheet, from its path in the repository
+def example_download(path, label):
+    path = ROOT / path
+    st.download_button(label=label, data=path.read_bytes(), file_name=path.name, mime=XLSX_MIME)
+
+# Page text: the columns an upload needs, and the other kinds of upload the entity takes
+def _description(spec):
+    name, code = spec['name_column'], spec['code_column']
+    text = f"""
+Your {name} data spreadsheet must include two columns: '{name}' and '{code}'. The {name} codes are used to match the location data to create a map.
+
+If your spreadsheet lists {name}s in the '{name}' column but does not include {name} codes, use the **{name} Code Matchmaker** to find the '{code}'.
+"""
+    if spec['kind'] == 'boundary':
+        text += f"""
+A spreadsheet of points with 'Latitude' and 'Longitude' columns can be mapped instead: choose **Latitude/longitude points** below and every point is counted in the {name} it falls in.
+"""
+    if spec['rollups']:
+        levels = ' or '.join(f"**{name}s per {registry.MAP_MAKERS[level]['name_column']}**" for level in spec['rollups'])
+        text += f"""
+To map how many of your {name}s are in each {' or '.join(registry.MAP_MAKERS[level]['name_column'] for level in spec['rollups'])}, choose {levels} below.
+"""
+    return text
+
+# How the upload is mapped: None for rows of the entity with their codes, 'points' for
+# latitude/longitude points counted in each boundary, or the level Schools are rolled up to
+def _upload_mode(entity, spec):
+    name = spec['name_column']
+    if spec['kind'] == 'boundary':
+        # Rows of the upload are entries with their codes, or points counted in the boundary holding them
+        modes = {f'{name}s': None, 'Latitude/longitude points': 'points'}
+        return modes[st.radio('Spreadsheet rows are', list(modes), horizontal=True)]
+    if spec['rollups']:
+        # Map the locations, or roll them up to the boundaries holding them
+        modes = {f'{name} locations': None, **{f"{name}s per {registry.MAP_MAKERS[level]['name_column']}": level for level in spec['rollups']}}
+        return modes[st.radio(f'Map {name}s as', list(modes), horizontal=True)]
+    return None
+
+# Read, join and cache an upload in the given mode. Returns the upload's tables, the
+# entity of the layer the map is drawn from and the tables joined to that layer.
+def _load(entity, mode, upload_data, filename):
+    from mtss_maps import uploads
+    if mode == 'points':
+        upload = uploads.load_point_upload(upload_data, filename, entity)
+        return upload, entity, upload
+    upload = uploads.load_upload(upload_data, filename, entity)
+    if mode:
+        return upload, mode, uploads.load_rollup(upload_data, filename, mode)
+    return upload, entity, upload
+
+# Color controls of a boundary map: the column colored by and its classes. Counted
+# uploads (points or rolled-up Schools) are colored by their counts unless asked otherwise.
+def _classification_settings(spec, df, default_column):
+    from mtss_maps import choropleth
+    value_column = choropleth.PRESENCE
+    method, classes, breaks = 'quantile', choropleth.CLASSES, None
+    value_columns = choropleth.value_columns(df)
+    if value_columns:
+        choices = {'Included in spreadsheet': choropleth.PRESENCE, **{column: column for column in value_columns}}
+        default = list(choices).index(default_column) if default_column in choices else 0
+        value_column = choices[st.selectbox(f"Color {spec['name_column']}s by", list(choices), index=default)]
+        if value_column != choropleth.PRESENCE:
+            methods = {label: method for method, label in choropleth.METHODS.items()}
+            method = methods[st.radio('Classes', list(methods), horizontal=True)]
+            if method == 'breaks':
+                breaks_text = st.text_input('Class breaks (comma-separated)', '')
+                try:
+                    breaks = [float(value) for value in breaks_text.split(',') if value.strip()]
+                except ValueError:
+                    st.warning('Class breaks must be numbers separated by commas.')
+                    breaks = []
+            else:
+                classes = st.slider('Number of classes', 2, 9, choropleth.CLASSES)
+    return value_column, method, classes, breaks
+
+# Included and unmatched lists, rerun on their own when a list is downloaded
+@display.fragment
+def show_lists(entity, upload):
+    spec = registry.MAP_MAKERS[entity]
+    name = spec['name_column']
+    columns = [name, spec['code_column']]
+    st.divider()
+
+    # Entries of the upload matched in the reference layer
+    included = upload['included']
+    if not included.empty:
+        st.write(f"{name}s Included:")
+        st.dataframe(included[columns].reset_index(drop=True))
+        st.write(f"Total number of {name}s:", len(included))
+        st.download_button(
+            label=f"Download Included {name} List to Verify",
+            data=included[columns].to_csv(index=False).encode('utf-8'),
+            file_name=f"{name}_List_to_Verify.csv",
+            mime="text/csv",
+            key='download-csv-1'
+        )
+    else:
+        st.write(f"No {name}s")
+
+    st.divider()
+
+    # Rows of the upload whose code matched nothing, calling out codes that are blank or not codes at all
+    unmatched = upload['unmatched']
+    invalid = upload.get('invalid')
+    if invalid is not None and not invalid.empty:
+        st.warning(f"{len(invalid)} {name}s have a blank or invalid {spec['code_column']} and could not be matched. They are listed as unmatched below.")
+    if not unmatched.empty:
+        st.write(f"{name}s unmatched:")
+        st.dataframe(unmatched[columns].reset_index(drop=True))
+        st.write(f"Total number of unmatched {name}s:", len(unmatched))
+        st.download_button(
+            label=f"Download Unmatched {name} List",
+            data=unmatched[columns].to_csv(index=False).encode('utf-8'),
+            file_name=f"Unmatched_{name}_List.csv",
+            mime="text/csv",
+            key='download-csv-unmatched-df'
+        )
+    elif 'outside' in upload:
+        st.write(f"Points outside every {name}:", upload['outside'])
+    else:
+        st.write(f"All {name}s from your spreadsheet matched with the {spec['source']}.")
+
+# Map and map downloads, rerun on their own when the map is clicked or downloaded.
+# The PNG is drawn by load_png only when asked for. Rolled-up maps also list the count of each boundary.
+@display.fragment
+def show_map_section(entity, maps, map_name, events, load_png, rolled=None, level=None):
+    st_data = display.show_map(maps, events, key=f'{entity}-map')
+    if st_data and st_data.get('last_object_clicked_tooltip'):
+        st.caption(st_data['last_object_clicked_tooltip'])
+
+    if rolled is not None:
+        from mtss_maps import rollup
+        label = registry.MAP_MAKERS[level]['name_column']
+        columns = [label, registry.MAP_MAKERS[level]['code_column'], rollup.SCHOOLS]
+        st.write(f"{registry.MAP_MAKERS[entity]['name_column']}s per {label}:")
+        st.dataframe(rolled['df'][columns])
+        st.download_button(
+            label=f"Download {registry.MAP_MAKERS[entity]['name_column']}s per {label} List",
+            data=rolled['df'][columns].to_csv(index=False).encode('utf-8'),
+            file_name=f"{registry.MAP_MAKERS[entity]['name_column']}s_per_{label}_List.csv",
+            mime="text/csv",
+            key='download-csv-rollup'
+        )
+
+    # Offer the map for download as HTML
+    st.download_button(
+        label="Download Map as HTML",
+        data=maps['html'],
+        file_name=f"{map_name}.html",
+        mime="text/html",
+        type="primary"
+    )
+
+    # Static image of the map for reports, drawn without a browser once it is asked for
+    if st.button("Create Map as PNG", key=f'{entity}-png'):
+        with st.spinner("Drawing the map"):
+            png = load_png()
+        st.download_button(
+            label="Download Map as PNG",
+            data=png,
+            file_name=f"{map_name}.png",
+            mime="image/png"
+        )
+
+#------------------------------------------------------------------------
+# Page
+#------------------------------------------------------------------------
+
+# The Map Maker page of an entity, configured entirely by its MAP_MAKERS entry
+def run_page(entity):
+    spec = registry.MAP_MAKERS[entity]
+    name = spec['name_column']
+    page_header(spec['title'])
+
+    # Time the stages of this run for the performance panel and the JSON log
+    spans = display.start_spans(entity)
+
+    # Load the mapping modules and reference data in the background while the visitor picks a
+    # file, this page's entity first. Does nothing once the app has been warmed up at boot.
+    warmup.start(entity)
+
+    # Map events are opt-in: without them the map is shown as static HTML, so panning or zooming never reruns the page
+    map_events = st.sidebar.toggle('Map click events')
+
+    st.divider()
+    st.markdown(_description(spec))
+    example_download(spec['example'], f"Download an example {name} data spreadsheet")
+    st.divider()
+
+    mode = _upload_mode(entity, spec)
+
+    # Excel/CSV file upload
+    uploaded_file = st.file_uploader(f"Upload your {name} data XLSX | CSV", type=['xlsx', 'csv'])
+    if uploaded_file is not None:
+        with st.spinner("Processing data and generating map"), warmup.paused():
+            from mtss_maps import choropleth, pipeline, reference, render, rollup, spatial, templates, tiles, uploads
+
+            # Check the file type before reading it
+            if not uploaded_file.name.endswith(('.csv', '.xlsx')):
+                st.error("Unsupported file format. Please upload a CSV or XLSX file.")
+                display.stop(spans)  # Stop execution if file format is not supported
+            if not reference.layer_available(spec['layer']):
+                st.error(f"The {spec['source']} is missing.")
+                display.stop(spans)
+
+            # Read the upload, convert its codes to an integer key and join it to the reference layer.
+            # Done once per distinct file and mode: reruns of the page reuse the cached result.
+            upload_data = uploaded_file.getvalue()
+            try:
+                upload, map_entity, mapped = _load(entity, mode, upload_data, uploaded_file.name)
+            except ValueError as error:
+                st.warning(str(error))
+                display.stop(spans)  # Stop execution if required columns are not present
+            map_spec = registry.MAP_MAKERS[map_entity]
+
+            # Vector tile mode is offered once the boundary tiles are built (python -m mtss_maps.tiles)
+            tile_mode = spec['kind'] == 'boundary' and tiles.tiles_available(spec['layer']) and st.sidebar.toggle('Vector tile map')
+
+            # Boundaries are colored by presence in the upload or by classes of a numeric column,
+            # in one vectorized pass; point locations are drawn in the entity's color
+            settings = (mode,)
+            classification = None
+            if map_spec['kind'] == 'boundary':
+                default_column = spatial.POINTS if mode == 'points' else rollup.SCHOOLS if mode else None
+                value_column, method, classes, breaks = _classification_settings(map_spec, mapped['df'], default_column)
+                classification = choropleth.classify(mapped['combined'], map_spec['color'], value_column, method, classes, breaks)
+                settings += (value_column, method, classes, tuple(breaks or ()), tile_mode)
+
+            # Simplified geometry (or vector tiles) for the on-screen map. The HTML download of a boundary
+            # map fills the entity's pre-rendered template, with finer geometry, in the upload's classes.
+            # Built once per upload and map settings; reruns reuse the map and its downloads.
+            def build_maps():
+                combined = mapped['combined']
+                m = pipeline.create_map(map_entity, combined, 'live', classification, use_tiles=tile_mode)
+                html = display.view_html(m)
+                export = templates.export_html(map_entity, combined, classification) if map_spec['kind'] == 'boundary' else html
+                return {'map': m, 'view': html, 'html': export.encode('utf-8')}
+
+            maps = uploads.cache.get_or_build((uploads.upload_key(upload_data, entity), 'maps', settings), build_maps)
+
+            # The PNG is drawn the first time it is asked for, then cached next to the map
+            def build_png():
+                png = io.BytesIO()
+                render.save_figure(pipeline.create_figure(map_entity, mapped['combined'], classification), png, 'png')
+                return png.getvalue()
+
+            load_png = lambda: uploads.cache.get_or_build((uploads.upload_key(upload_data, entity), 'png', settings), build_png)
+            map_name = f"{name}s_per_{map_spec['name_column']}_Map" if map_entity != entity else f"{name}_Map"
+
+            show_lists(entity, upload)
+            st.divider()
+            show_map_section(entity, maps, map_name, map_events, load_png, mapped if map_entity != entity else None, map_entity)
+
+    # Stage timings of this run, when the performance panel is on
+    display.perf_panel(spans)
@@ -0,0 +1,87 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from mtss_maps import reference, statepack
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Code tables used by the Code Matchmaker pages: file location, name column and code column
+CODE_TABLES = {
+    'district': ('codes/MI_District_Codes.csv', 'District', 'District Code'),
+    'isd': ('codes/MI_ISD_Codes.csv', 'ISD', 'ISD Code'),
+    'psa': ('codes/MI_PSA_Codes.csv', 'PSA', 'PSA Code'),
+    'school': ('codes/MI_School_Codes.csv', 'School', 'School Code'),
+}
+
+#------------------------------------------------------------------------
+# Name index
+#------------------------------------------------------------------------
+
+# Hash index from exact (stripped, case-sensitive) names to codes.
+# A name listed more than once resolves to its first row, like a table scan would.
+class NameIndex:
+    def __init__(self, names, codes):
+        table = pd.DataFrame({'name': names.to_numpy(), 'code': codes.to_numpy()}).dropna(subset=['name'])
+        first = table.drop_duplicates('name', keep='first')
+        self._index = pd.Index(first['name'])
+        self._codes = first['code'].to_numpy(dtype=object)
+
+        # Names that map to more than one distinct code
+        distinct = table.drop_duplicates()
+        repeated = distinct[distinct.duplicated('name', keep=False)]
+        self.ambiguous = repeated.groupby('name', sort=False)['code'].agg(list)
+
+    # Codes for a batch of names; None where a name is not in the table
+    def lookup(self, names):
+        positions = self._index.get_indexer(names)
+        codes = np.where(positions >= 0, self._codes[positions], None)
+        return pd.Series(codes, index=names.index, dtype=object)
+
+    # The uploaded names that are ambiguous, with every code they could stand for
+    def ambiguous_in(self, names):
+        found = self.ambiguous[self.ambiguous.index.isin(names)]
+        return pd.DataFrame({
+            'Name': found.index,
+            'Code Used': [codes[0] for codes in found],
+            'All Codes': [', '.join(str(code) for code in codes) for codes in found],
+        })
+
+    def memory_usage(self):
+        return int(self._index.memory_usage(deep=True) + self._codes.nbytes + self.ambiguous.memory_usage(deep=True))
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Read a code table CSV with trailing spaces removed from the names
+def _read_source_table(entity):
+    path, name_column, code_column = CODE_TABLES[entity]
+    table = pd.read_csv(reference.ROOT / path, encoding='utf-8-sig')
+    table[name_column] = table[name_column].str.strip()
+    return table[[name_column, code_column]]
+
+# Read a code table from the state pack, or from its CSV when there is no pack
+def _read_code_table(entity):
+    table = statepack.read_entry('codes', entity)
+    if table is None:
+        table = _read_source_table(entity)
+    return table
+
+# Load a code table once per process. The returned frame is shared: do not modify it in place.
+def load_code_table(entity):
+    return reference.load_derived('codes', entity, lambda: _read_code_table(entity))
+
+# Load the name -> code index for a code table once per process
+def load_name_index(entity):
+    def build():
+        _, name_column, code_column = CODE_TABLES[entity]
+        table = load_code_table(entity)
+        return NameIndex(table[name_column], table[code_column])
+
+    return reference.load_derived('names', entity, build)
@@ -0,0 +1,93 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Logger of the span records, one JSON object per line
+LOGGER = 'mtss_maps.perf'
+
+# Where span records are logged: 'off' (the default), 'stderr', or the path of a file they are appended to
+LOG = os.environ.get('MTSS_PERF_LOG', 'off')
+
+# Spans of the current page run, with the fields added to each of them (page, session),
+# and the depth of the innermost open span
+_trace = ContextVar('trace', default=None)
+_context = ContextVar('context', default={})
+_depth = ContextVar('depth', default=0)
+
+logger = logging.getLogger(LOGGER)
+
+#------------------------------------------------------------------------
+# Logging
+#------------------------------------------------------------------------
+
+# Send span records to standard error, to a file, or nowhere. Records are written as
+# bare JSON lines and not passed on to the root logger, so log collectors can parse them.
+def configure(destination=LOG):
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.propagate = False
+    if destination == 'off':
+        logger.setLevel(logging.CRITICAL + 1)
+        return
+    handler = logging.StreamHandler(sys.stderr) if destination == 'stderr' else logging.FileHandler(destination)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+configure()
+
+#------------------------------------------------------------------------
+# Spans
+#------------------------------------------------------------------------
+
+# Start collecting the spans of a page run. Returns the list the spans are added to, in
+# the order they start; fields such as the page and session are added to every span logged.
+def start(**fields):
+    spans = []
+    _trace.set(spans)
+    _context.set(fields)
+    _depth.set(0)
+    return spans
+
+# Time a stage. Yields the span record, so the stage can add its row count ('rows'),
+# payload size ('bytes') or anything else worth logging. The wall time is added when the
+# stage ends, as is the error type when it raises. Spans opened inside another are one level deeper.
+@contextmanager
+def span(stage, **fields):
+    depth = _depth.get()
+    record = {'stage': stage, **fields}
+    spans = _trace.get()
+    if spans is not None:
+        spans.append(record)
+    token = _depth.set(depth + 1)
+    start_time = time.perf_counter()
+    try:
+        yield record
+    except BaseException as error:
+        record['error'] = type(error).__name__
+        raise
+    finally:
+        record['seconds'] = round(time.perf_counter() - start_time, 6)
+        record['depth'] = depth
+        _depth.reset(token)
+        _log(record)
+
+# Log a finished span as one JSON line
+def _log(record):
+    if logger.isEnabledFor(logging.INFO):
+        line = {'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'), **_context.get(), **record}
+        logger.info(json.dumps(line, default=str))
@@ -0,0 +1,278 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import json
+import os
+from pathlib import Path
+
+import folium
+import pandas as pd
+
+from mtss_maps import choropleth, codes, ingest, perf, points, reference, registry, render, simplify, tiles, topology
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Map Maker entities, from the registry the pages are built from
+MAP_MAKERS = registry.MAP_MAKERS
+
+# Initial view of every map
+CENTER = [44.3148, -85.6024]
+ZOOM = 7
+
+# Drawing order of the layers of a combined map, from the bottom up
+COMBINED_ORDER = ('isd', 'district', 'psa', 'school')
+
+# How boundaries are embedded in maps: 'topojson' (borders shared by neighbors stored once,
+# coordinates quantized to topology.PRECISION decimal places) or 'geojson' (full precision)
+ENCODING = os.environ.get('MTSS_MAP_ENCODING', 'topojson')
+
+# Style of the Michigan border
+BORDER_STYLE = {'color': 'black', 'weight': 1.5, 'fillOpacity': 0, 'lineOpacity': 1}
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Read an uploaded spreadsheet and add the integer code key and the "Count" column.
+# The header is checked before any row is read; then only the name and code columns
+# and the numeric columns that can be mapped are read.
+# Raises ValueError for unsupported files, missing columns or files over the upload limits.
+def read_upload(source, entity, filename=None):
+    spec = MAP_MAKERS[entity]
+    required_columns = [spec['name_column'], spec['code_column']]
+    _, columns = ingest.read_headers(source, filename)[0]
+    if not all(col in columns for col in required_columns):
+        raise ValueError(f"The uploaded file must contain '{required_columns[0]}' and '{required_columns[1]}' columns.")
+
+    df = ingest.read_columns(source, filename, required_columns, text_columns=[spec['code_column']], numeric=True)
+    return prepare_upload(df, entity)
+
+# Read an uploaded workbook (or a CSV) and pick out the entities it holds: an entity is
+# present when a sheet has its name and code columns, and only those columns are read.
+# Returns the prepared table of each entity found, in MAP_MAKERS order.
+def read_workbook(source, filename=None):
+    headers = ingest.read_headers(source, filename)
+    found = {}
+    for entity, spec in MAP_MAKERS.items():
+        required_columns = [spec['name_column'], spec['code_column']]
+        sheet = next((sheet for sheet, columns in headers if all(col in columns for col in required_columns)), False)
+        if sheet is not False:
+            df = ingest.read_columns(source, filename, required_columns, sheet, text_columns=[spec['code_column']])
+            found[entity] = prepare_upload(df, entity)
+    if not found:
+        raise ValueError("The uploaded file must contain a name and code column pair, such as 'District' and 'District Code'.")
+    return found
+
+# Add the code key and "Count" columns to an entity's table
+def prepare_upload(df, entity):
+    with perf.span('normalize', entity=entity, rows=len(df)) as record:
+        valid = codes.normalize_codes(df, MAP_MAKERS[entity]['code_column'])
+        df['Count'] = 1
+        record['invalid'] = int((~valid).sum())
+    return df
+
+# Uploaded rows whose code is blank or not a code at all ('TBD', 'NA'). They can never
+# match and are listed as unmatched; pages and the batch report also call them out.
+def invalid_codes(entity, df):
+    spec = MAP_MAKERS[entity]
+    return df.loc[df[codes.KEY].isna(), [spec['name_column'], spec['code_column']]].reset_index(drop=True)
+
+# Join an upload to its reference layer. Returns the combined layer, the
+# included entries and the uploaded rows that matched nothing. A code listed more
+# than once is joined once, with the values of its first row, so the layer keeps
+# one feature per entry however many rows the upload has.
+def combine(entity, df):
+    spec = MAP_MAKERS[entity]
+    layer = reference.load_layer(spec['layer'])
+    with perf.span('merge', entity=entity) as record:
+        joined = df[df[codes.KEY].notna()].drop_duplicates(codes.KEY)
+        combined = pd.merge(layer, joined, on=codes.KEY, how='left', suffixes=('', '_drop'))
+        combined = combined.loc[:, ~combined.columns.str.endswith('_drop')]
+
+        if spec['kind'] == 'boundary':
+            # Only presence is filled in: a blank value of a matched entry stays missing,
+            # so it is drawn as no data instead of counting as 0 in the classes
+            combined[choropleth.PRESENCE] = combined[choropleth.PRESENCE].fillna(0).astype(int)
+        else:
+            combined['Latitude'] = pd.to_numeric(combined['Latitude'], errors='coerce')
+            combined['Longitude'] = pd.to_numeric(combined['Longitude'], errors='coerce')
+            combined = combined.dropna(subset=['Latitude', 'Longitude'])
+
+        columns = [spec['name_column'], spec['code_column']]
+        included = combined.loc[combined['Count'] == 1, columns].reset_index(drop=True)
+        unmatched = df.loc[~df[codes.KEY].isin(combined[codes.KEY]) | df[codes.KEY].isna(), columns].reset_index(drop=True)
+        record['rows'] = len(combined)
+    return combined, included, unmatched
+
+# Features of an entity's map layer: boundaries carrying their class, simplified for the
+# given target and encoded as TopoJSON or GeoJSON, or the matched point locations as GeoJSON
+def layer_features(entity, combined, target='html', classification=None, encoding=None):
+    spec = MAP_MAKERS[entity]
+    encoding = encoding or ENCODING
+    with perf.span('features', entity=entity, target=target) as record:
+        if spec['kind'] == 'boundary':
+            classification = classification or choropleth.classify(combined, spec['color'])
+            level = simplify.level_for(ZOOM, target=target)
+            if encoding == 'topojson':
+                features = topology.class_topology(combined, spec['layer'], level, classification, [spec['name_column']])
+            else:
+                features = choropleth.class_geojson(simplify.with_level(combined, spec['layer'], level), classification, [spec['name_column']])
+            record.update(rows=len(combined), encoding=encoding)
+        else:
+            features = points.point_features(combined[combined['Count'] == 1], spec['name_column'])
+            record['rows'] = len(features['features'])
+    return features
+
+# Map layer of an entity from its features (as built by layer_features, or serialized)
+# and, for boundaries, the style of each class. The layer is named for the layer control
+# of combined maps.
+def entity_layer(entity, features, styles=None):
+    spec = MAP_MAKERS[entity]
+    name = f"{spec['name_column']}s"
+    if spec['kind'] == 'point':
+        return points.feature_layer(features, spec['name_column'], spec['color'], name=name)
+
+    if isinstance(features, str):
+        features = json.loads(features)
+    tooltip = folium.GeoJsonTooltip(fields=[spec['name_column']], aliases=[f"{spec['name_column']}: "])
+    if features['type'] == 'Topology':
+        layer = topology.TopoJsonLayer(features, name=name, tooltip=tooltip)
+    else:
+        layer = folium.GeoJson(features, name=name, tooltip=tooltip)
+    choropleth.ClassStyles(styles).add_to(layer)
+    return layer
+
+# Michigan border, drawn above boundaries and below point locations
+def add_border(m, encoding=None):
+    if (encoding or ENCODING) == 'topojson':
+        border = topology.TopoJsonLayer(topology.layer_topology('michigan'), control=False)
+        choropleth.ClassStyles([BORDER_STYLE]).add_to(border)
+        border.add_to(m)
+        return
+    folium.GeoJson(
+        reference.load_layer('michigan'),
+        control=False,
+        style_function=lambda feature: BORDER_STYLE
+    ).add_to(m)
+
+# Folium map of a combined layer, with boundaries simplified for the given target or
+# drawn from pre-cut vector tiles. Boundaries are colored by a classification, by
+# default matched versus unmatched, and embedded in the given encoding.
+def create_map(entity, combined, target='html', classification=None, use_tiles=False, encoding=None):
+    spec = MAP_MAKERS[entity]
+
+    if spec['kind'] == 'boundary':
+        classification = classification or choropleth.classify(combined, spec['color'])
+        m = folium.Map(location=CENTER, zoom_start=ZOOM)
+        if use_tiles:
+            # The class of each code is joined to the tiles in the browser
+            tiles.CodeJoinedVectorTiles(
+                spec['layer'],
+                classification.by_code(combined[spec['code_column']]),
+                classification.styles,
+                label=f"{spec['name_column']}: "
+            ).add_to(m)
+        else:
+            entity_layer(entity, layer_features(entity, combined, target, classification, encoding), classification.styles).add_to(m)
+        legend = classification.legend()
+        if legend is not None:
+            legend.add_to(m)
+    else:
+        m = folium.Map(location=CENTER, zoom_start=ZOOM, attr='MiMTSS TA Center', prefer_canvas=True)
+
+    add_border(m, encoding)
+
+    if spec['kind'] == 'point':
+        entity_layer(entity, layer_features(entity, combined)).add_to(m)
+
+    return m
+
+# Match lists and map layer of one entity of a workbook, for combined maps. The layer's
+# features are kept serialized; the joined layer itself is not kept.
+def workbook_layer(entity, df, target='html'):
+    spec = MAP_MAKERS[entity]
+    combined, included, unmatched = combine(entity, df)
+    classification = choropleth.classify(combined, spec['color']) if spec['kind'] == 'boundary' else None
+    features = layer_features(entity, combined, target, classification)
+    with perf.span('serialize', entity=entity) as record:
+        features = json.dumps(features)
+        record['bytes'] = len(features)
+    return {
+        'included': included,
+        'unmatched': unmatched,
+        'invalid': invalid_codes(entity, df),
+        'features': features,
+        'styles': classification.styles if classification else None,
+    }
+
+# Map of several entities, one toggleable layer each, from the workbook layers of the
+# enabled entities. Boundaries are drawn below the border and point locations above it.
+def create_combined_map(layers):
+    kinds = {entity: MAP_MAKERS[entity]['kind'] for entity in layers}
+    m = folium.Map(location=CENTER, zoom_start=ZOOM, attr='MiMTSS TA Center', prefer_canvas='point' in kinds.values())
+    ordered = sorted(layers, key=COMBINED_ORDER.index)
+    for entity in ordered:
+        if kinds[entity] == 'boundary':
+            entity_layer(entity, layers[entity]['features'], layers[entity]['styles']).add_to(m)
+    add_border(m)
+    for entity in ordered:
+        if kinds[entity] == 'point':
+            entity_layer(entity, layers[entity]['features']).add_to(m)
+    folium.LayerControl(collapsed=False).add_to(m)
+    return m
+
+# Static figure of a combined layer, drawn from the projected geometry cache
+def create_figure(entity, combined, classification=None):
+    spec = MAP_MAKERS[entity]
+    with perf.span('figure', entity=entity):
+        if spec['kind'] == 'boundary':
+            classification = classification or choropleth.classify(combined, spec['color'])
+            return render.boundary_figure(spec['layer'], combined, classification)
+        return render.point_figure(spec['layer'], combined, spec['color'])
+
+# Load everything a map needs ahead of the first file, once per process
+def warm(entity, target='html', figures=False):
+    spec = MAP_MAKERS[entity]
+    reference.load_layer(spec['layer'])
+    reference.load_layer('michigan')
+    if spec['kind'] == 'boundary':
+        simplify.load_level(spec['layer'], simplify.level_for(ZOOM, target=target))
+    if ENCODING == 'topojson':
+        topology.load_topology('michigan', 'full')
+        if spec['kind'] == 'boundary':
+            topology.load_topology(spec['layer'], simplify.level_for(ZOOM, target=target))
+    if figures:
+        render.load_shapes('michigan')
+        if spec['kind'] == 'boundary':
+            render.load_shapes(spec['layer'])
+        else:
+            render.load_points(spec['layer'])
+
+# Generate the map and the included/unmatched lists of one spreadsheet into a directory,
+# under the same file names the Map Maker pages offer for download. Formats other
+# than 'html' are static figures (png, svg, pdf).
+def run(source, entity, out_dir, formats=('html',)):
+    label = MAP_MAKERS[entity]['name_column']
+    df = read_upload(source, entity)
+    combined, included, unmatched = combine(entity, df)
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if 'html' in formats:
+        if MAP_MAKERS[entity]['kind'] == 'boundary':
+            # Boundary maps are filled into the entity's template, which is built on this module
+            from mtss_maps import templates
+            (out_dir / f'{label}_Map.html').write_text(templates.export_html(entity, combined), encoding='utf-8')
+        else:
+            create_map(entity, combined).save(str(out_dir / f'{label}_Map.html'))
+    figure_formats = [format for format in formats if format != 'html']
+    if figure_formats:
+        figure = create_figure(entity, combined)
+        for format in figure_formats:
+            render.save_figure(figure, out_dir / f'{label}_Map.{format}', format)
+    included.to_csv(out_dir / f'{label}_List_to_Verify.csv', index=False)
+    unmatched.to_csv(out_dir / f'Unmatched_{label}_List.csv', index=False)
+    return {'rows': len(df), 'included': len(included), 'unmatched': len(unmatched), 'invalid': len(invalid_codes(entity, df))}
@@ -0,0 +1,39 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import folium
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# FeatureCollection of point locations, built column-wise from the Latitude/Longitude columns
+def point_features(locations, popup_column):
+    coordinates = locations[['Longitude', 'Latitude']].to_numpy(dtype=float).round(6).tolist()
+    labels = locations[popup_column].astype(str).tolist()
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': point}, 'properties': {popup_column: label}}
+            for point, label in zip(coordinates, labels)
+        ],
+    }
+
+# Circle marker layer of a point FeatureCollection (a dict or its JSON), optionally named for a layer control.
+# Draw it on a map created with prefer_canvas=True so the markers share one canvas.
+def feature_layer(features, popup_column, color, name=None):
+    return folium.GeoJson(
+        features,
+        name=name,
+        marker=folium.CircleMarker(
+            radius=8,  # Small radius for the dot
+            color=color,  # Border color of the circle
+            stroke=False,  # No border
+            fill=True,  # Fill the circle
+            fill_color=color,  # Fill color of the circle
+            fill_opacity=0.6,  # Opacity of the fill
+            opacity=1,  # Opacity of the stroke (not used since stroke=False)
+        ),
+        popup=folium.GeoJsonPopup(fields=[popup_column], labels=False),
+    )
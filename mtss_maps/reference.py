@@ -0,0 +1,147 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import sys
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from mtss_maps import codes, perf, statepack
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Repository root, so the reference files resolve no matter where the app is started from
+ROOT = Path(__file__).resolve().parent.parent
+
+# Reference layers used by the Map Maker pages: file location, column renames,
+# columns to drop and the code column that uploads are matched against
+LAYERS = {
+    'district': {
+        'path': 'geojson/School_Districts.geojson',
+        'rename': {'DCODE': 'District Code', 'NAME': 'District'},
+        'drop': ['OBJECTID', 'FIPSCODE', 'FIPSNUM', 'LABEL', 'TYPE', 'SQKM', 'SQMILES', 'ACRES', 'VER', 'LAYOUT', 'PENINSULA', 'ShapeSTArea', 'ShapeSTLength', 'ISD'],
+        'code_column': 'District Code',
+    },
+    'isd': {
+        'path': 'geojson/Intermediate_School_Districts.geojson',
+        'rename': {'ISD': 'ISD Code', 'NAME': 'ISD'},
+        'drop': ['OBJECTID', 'LABEL', 'TYPE', 'SQKM', 'SQMILES', 'ACRES', 'VER', 'LAYOUT', 'PENINSULA', 'ISDCode', 'ISD1', 'ShapeSTArea', 'ShapeSTLength'],
+        'code_column': 'ISD Code',
+    },
+    'psa': {
+        'path': 'geojson/PSA_geojson.csv',
+        'rename': {},
+        'drop': ['Street', 'City', 'State', 'Zip', 'Address_Unformatted', 'confidence', 'confidence_city_level', 'confidence_street_level'],
+        'code_column': 'PSA Code',
+    },
+    'school': {
+        'path': 'geojson/School_geojson.csv',
+        'rename': {},
+        'drop': ['Address', 'City', 'ZIP Code', 'Grade Levels', 'Locale', 'District Code', 'District', 'ISD Code', 'ISD Name'],
+        'code_column': 'School Code',
+    },
+    'michigan': {
+        'path': 'geojson/michigan.geojson',
+        'rename': {},
+        'drop': [],
+        'code_column': None,
+    },
+}
+
+# Process-wide cache of loaded layers, shared by every session
+_layers = {}
+_lock = threading.Lock()
+
+# One lock per derived layer being built, so a page and the warm-up never build the same one twice
+_building = {}
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Path of a reference layer file
+def layer_path(name):
+    return ROOT / LAYERS[name]['path']
+
+# Whether a layer can be loaded, from the state pack or its reference file
+def layer_available(name):
+    return statepack.has_entry('layers', name) or layer_path(name).exists()
+
+# Read a reference file from disk and normalize its columns. geopandas is imported here
+# rather than with this module, which the Code Matchmakers load for its cache alone.
+def _read_source_layer(name):
+    import geopandas as gpd
+
+    spec = LAYERS[name]
+    layer = gpd.read_file(layer_path(name))
+    layer = layer.rename(columns=spec['rename'])
+
+    # Drop unwanted columns
+    layer = layer.drop(columns=[col for col in spec['drop'] if col in layer.columns])
+
+    # Add the integer code key and pad the code column with leading zeros
+    if spec['code_column']:
+        codes.normalize_codes(layer, spec['code_column'])
+        codes.check_keys(layer[spec['code_column']], layer[codes.KEY], spec['path'])
+
+    return layer
+
+# Read a layer from the state pack, where it is stored already normalized,
+# or from its reference file when there is no pack
+def _read_layer(name):
+    layer = statepack.read_entry('layers', name)
+    if layer is None:
+        layer = _read_source_layer(name)
+    return layer
+
+# Load a reference layer once per process and share it between sessions.
+# The returned GeoDataFrame is shared: callers must not modify it in place.
+def load_layer(name):
+    layer = _layers.get(name)
+    if layer is None:
+        with _lock:
+            layer = _layers.get(name)
+            if layer is None:
+                with perf.span('load', layer=name) as record:
+                    layer = _read_layer(name)
+                    record['rows'] = len(layer)
+                _layers[name] = layer
+    return layer
+
+# Load a layer derived from a reference layer (such as a simplified copy) once per process.
+# Callers asking for a layer being built wait for it; different layers build in parallel.
+def load_derived(name, variant, build):
+    key = f'{name}@{variant}'
+    layer = _layers.get(key)
+    if layer is None:
+        with _lock:
+            building = _building.setdefault(key, threading.Lock())
+        with building:
+            layer = _layers.get(key)
+            if layer is None:
+                with perf.span('load', layer=key):
+                    layer = build()
+                with _lock:
+                    layer = _layers.setdefault(key, layer)
+    return layer
+
+# Approximate memory held by one cached item, in bytes. A GeoDataFrame can only be
+# cached once geopandas has been imported.
+def memory_usage(item):
+    gpd = sys.modules.get('geopandas')
+    if gpd is not None and isinstance(item, gpd.GeoDataFrame):
+        import shapely
+        attributes = item.drop(columns=item.geometry.name).memory_usage(deep=True).sum()
+        coordinates = shapely.get_num_coordinates(item.geometry.values).sum() * 16
+        return int(attributes + coordinates)
+    if isinstance(item, pd.DataFrame):
+        return int(item.memory_usage(deep=True).sum())
+    return item.memory_usage()
+
+# Approximate memory held by each cached layer (and derived table or index), in bytes
+def layer_memory_usage():
+    return {name: memory_usage(item) for name, item in list(_layers.items())}
@@ -0,0 +1,28 @@
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Kept free of imports, so pages can read it before the mapping modules are loaded.
+
+# Map Maker entities: reference layer, name and code columns, whether the layer
+# holds boundaries or point locations, and the color of the matched entries. The
+# Map Maker pages are built from the rest: the page header, the example spreadsheet,
+# the reference file named in the match messages and the levels the entity rolls up to.
+MAP_MAKERS = {
+    'district': {
+        'layer': 'district', 'name_column': 'District', 'code_column': 'District Code', 'kind': 'boundary', 'color': '#006DB6',
+        'title': 'School Districts', 'example': 'examples/District_Data.xlsx', 'source': 'Michigan District GeoJSON file', 'rollups': (),
+    },
+    'isd': {
+        'layer': 'isd', 'name_column': 'ISD', 'code_column': 'ISD Code', 'kind': 'boundary', 'color': '#48BB88',
+        'title': 'Intermediate School Districts', 'example': 'examples/ISD_Data.xlsx', 'source': 'Michigan ISD GeoJSON file', 'rollups': (),
+    },
+    'psa': {
+        'layer': 'psa', 'name_column': 'PSA', 'code_column': 'PSA Code', 'kind': 'point', 'color': '#006DB6',
+        'title': 'Public School Academies', 'example': 'examples/PSA_Data.xlsx', 'source': 'Michigan PSA Location file', 'rollups': (),
+    },
+    'school': {
+        'layer': 'school', 'name_column': 'School', 'code_column': 'School Code', 'kind': 'point', 'color': '#006DB6',
+        'title': 'Schools', 'example': 'examples/School_Data.xlsx', 'source': 'Michigan School Location file', 'rollups': ('district', 'isd'),
+    },
+}
@@ -0,0 +1,162 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+import shapely
+from matplotlib.collections import PathCollection
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.path import Path as MplPath
+from pyproj import Transformer
+from shapely.geometry.polygon import orient
+
+from mtss_maps import codes, perf, reference, simplify
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Michigan Oblique Mercator, so the state is drawn without the stretch of plain longitude/latitude
+PROJECTION = 'EPSG:3078'
+
+# Simplification level drawn in static figures; finer detail is invisible at report size
+LEVEL = 'fine'
+
+# Figure size in inches and default resolution of raster output
+FIGSIZE = (7.25, 7.25)
+DPI = 150
+
+# Output formats and their MIME types
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+    'pdf': 'application/pdf',
+}
+
+# Match the look of the interactive maps; line widths are Leaflet's pixel weights in points
+BOUNDARY_WIDTH = 0.15 * 0.75
+OUTLINE_WIDTH = 1.5 * 0.75
+POINT_SIZE = 12
+
+#------------------------------------------------------------------------
+# Projected shapes
+#------------------------------------------------------------------------
+
+# Matplotlib paths of a boundary layer in the figure projection, with the code key
+# of each feature. Built once per process; every figure then only picks colors.
+class ProjectedShapes:
+    def __init__(self, geometries, keys):
+        self.keys = keys
+        self.paths = [_polygon_path(geometry) for geometry in geometries]
+        self.bounds = shapely.total_bounds(geometries)
+
+    def memory_usage(self):
+        return int(self.keys.nbytes + sum(path.vertices.nbytes + path.codes.nbytes for path in self.paths))
+
+# Projected coordinates of a point layer, with the code key of each location
+class ProjectedPoints:
+    def __init__(self, x, y, keys):
+        self.x = x
+        self.y = y
+        self.keys = keys
+
+    def memory_usage(self):
+        return int(self.x.nbytes + self.y.nbytes + self.keys.nbytes)
+
+# One compound path for a (multi)polygon, with holes wound opposite their shells
+def _polygon_path(geometry):
+    vertices, path_codes = [], []
+    for polygon in getattr(geometry, 'geoms', [geometry]):
+        if polygon.is_empty:
+            continue
+        polygon = orient(polygon, 1.0)
+        for ring in [polygon.exterior, *polygon.interiors]:
+            ring = np.asarray(ring.coords)
+            ring_codes = np.full(len(ring), MplPath.LINETO, dtype=MplPath.code_type)
+            ring_codes[0] = MplPath.MOVETO
+            ring_codes[-1] = MplPath.CLOSEPOLY
+            vertices.append(ring)
+            path_codes.append(ring_codes)
+    if not vertices:
+        return MplPath(np.empty((0, 2)))
+    return MplPath(np.concatenate(vertices), np.concatenate(path_codes))
+
+# Load the projected paths of a boundary layer once per process
+def load_shapes(name):
+    def build():
+        layer = simplify.load_level(name, LEVEL).to_crs(PROJECTION)
+        keys = layer[codes.KEY].to_numpy(dtype='int64', na_value=-1) if codes.KEY in layer else np.full(len(layer), -1)
+        return ProjectedShapes(layer.geometry.values.to_numpy(), keys)
+
+    return reference.load_derived(name, 'projected', build)
+
+# Load the projected coordinates of a point layer once per process
+def load_points(name):
+    def build():
+        layer = reference.load_layer(name)
+        longitude = pd.to_numeric(layer['Longitude'], errors='coerce').to_numpy(dtype=float)
+        latitude = pd.to_numeric(layer['Latitude'], errors='coerce').to_numpy(dtype=float)
+        x, y = Transformer.from_crs('EPSG:4326', PROJECTION, always_xy=True).transform(longitude, latitude)
+        return ProjectedPoints(np.asarray(x), np.asarray(y), layer[codes.KEY].to_numpy(dtype='int64', na_value=-1))
+
+    return reference.load_derived(name, 'projected', build)
+
+#------------------------------------------------------------------------
+# Figures
+#------------------------------------------------------------------------
+
+# Code keys of the entries matched by an upload in a combined layer
+def _matched_keys(combined):
+    return combined.loc[combined['Count'] == 1, codes.KEY].to_numpy(dtype='int64', na_value=-1)
+
+# Static figure of a boundary layer, filled by the class of each feature
+def boundary_figure(name, combined, classification):
+    shapes = load_shapes(name)
+    fills = np.array([_rgba(color, opacity) for color, opacity in classification.fills])
+    classes = pd.Series(classification.classes, index=combined[codes.KEY].to_numpy(dtype='int64', na_value=-1))
+    classes = classes[~classes.index.duplicated()].reindex(shapes.keys, fill_value=0).to_numpy()
+
+    fig, ax = _figure()
+    ax.add_collection(PathCollection(shapes.paths, facecolors=fills[classes], edgecolors='black', linewidths=BOUNDARY_WIDTH))
+    _add_outline(ax)
+    return fig
+
+# Static figure of a point layer: matched locations as dots inside the state outline
+def point_figure(name, combined, color):
+    locations = load_points(name)
+    matched = np.isin(locations.keys, _matched_keys(combined))
+
+    fig, ax = _figure()
+    _add_outline(ax)
+    ax.scatter(locations.x[matched], locations.y[matched], s=POINT_SIZE, color=color, alpha=0.6, linewidths=0)
+    return fig
+
+# Write a figure as PNG, SVG or PDF to a path or file object.
+# PNGs use light compression: the files are barely larger and much faster to write.
+def save_figure(fig, target, format='png', dpi=DPI):
+    options = {'pil_kwargs': {'compress_level': 1}} if format == 'png' else {}
+    with perf.span('export', format=format) as record:
+        fig.savefig(target, format=format, dpi=dpi, bbox_inches='tight', pad_inches=0.05, **options)
+        if hasattr(target, 'tell'):
+            record['bytes'] = target.tell()
+
+def _rgba(color, alpha):
+    return np.array(to_rgba(color, alpha))
+
+# Blank figure framed on Michigan, without axes
+def _figure():
+    fig = Figure(figsize=FIGSIZE)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_axis_off()
+    ax.set_aspect('equal')
+    minx, miny, maxx, maxy = load_shapes('michigan').bounds
+    ax.set_xlim(minx, maxx)
+    ax.set_ylim(miny, maxy)
+    return fig, ax
+
+# Michigan border on top of the features
+def _add_outline(ax):
+    outline = load_shapes('michigan')
+    ax.add_collection(PathCollection(outline.paths, facecolors='none', edgecolors='black', linewidths=OUTLINE_WIDTH, zorder=3))
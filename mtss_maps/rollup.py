@@ -0,0 +1,64 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import pandas as pd
+
+from mtss_maps import codes, perf, pipeline, reference, statepack
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Reference file listing the District and ISD of every School
+SOURCE = reference.LAYERS['school']['path']
+
+# Levels School uploads roll up to, with the code and name columns of each level in the source file
+LEVELS = {
+    'district': ('District Code', 'District'),
+    'isd': ('ISD Code', 'ISD Name'),
+}
+
+# Column holding the number of matched Schools in each District or ISD
+SCHOOLS = 'Schools'
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Read the School -> District -> ISD index from the School reference file: the integer
+# code key of each School, District and ISD, and the District and ISD names
+def _read_source_index():
+    columns = [column for level_columns in LEVELS.values() for column in level_columns]
+    table = pd.read_csv(reference.ROOT / SOURCE, dtype=str, usecols=['School Code', *columns], encoding='utf-8-sig')
+    index = pd.DataFrame({'school': codes.code_keys(table['School Code'])[0]})
+    codes.check_keys(table['School Code'], index['school'], SOURCE)
+    for level, (code_column, name_column) in LEVELS.items():
+        index[level] = codes.code_keys(table[code_column])[0]
+        codes.check_keys(table[code_column], index[level], SOURCE)
+        index[f'{level}_name'] = table[name_column].str.strip()
+    return index.dropna(subset=['school']).drop_duplicates('school').reset_index(drop=True)
+
+# Load the School -> District -> ISD index once per process, from the state pack or the School reference file
+def load_index():
+    def build():
+        index = statepack.read_entry('indexes', 'school')
+        return index if index is not None else _read_source_index()
+
+    return reference.load_derived('school', 'hierarchy', build)
+
+# Count the Schools of a School upload in each District or ISD, in one grouped pass over the
+# index. Returns a table shaped like a code upload of the level (name, code, code key and
+# "Count"), one row per District or ISD with the number of matched Schools in the "Schools" column.
+# A School listed more than once is counted once.
+def roll_up(school_df, level):
+    spec = pipeline.MAP_MAKERS[level]
+    index = load_index()
+    with perf.span('rollup', level=level, rows=len(school_df)):
+        matched = index[index['school'].isin(school_df[codes.KEY].dropna())]
+        table = matched.groupby(level, sort=False).agg(**{spec['name_column']: (f'{level}_name', 'first'), SCHOOLS: ('school', 'size')})
+        table = table.rename_axis(codes.KEY).reset_index()
+        table[codes.KEY] = table[codes.KEY].astype(index[level].dtype)
+        table[spec['code_column']] = codes.format_codes(table[codes.KEY])
+        table['Count'] = 1
+    return table[[spec['name_column'], spec['code_column'], codes.KEY, SCHOOLS, 'Count']]
@@ -0,0 +1,125 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from mtss_maps import fuzzy, matching, reference
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Number of results returned for a search string
+MAX_RESULTS = 50
+
+# Ranking of the ways an entry can match the search string
+EXACT = 4
+NAME_PREFIX = 3
+WORD_PREFIX = 2
+CODE_PREFIX = 1
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Positions in a sorted string array whose values start with the prefix
+def _prefix_range(sorted_values, prefix):
+    lo = np.searchsorted(sorted_values, prefix, side='left')
+    hi = np.searchsorted(sorted_values, prefix + '\uffff', side='right')
+    return lo, hi
+
+#------------------------------------------------------------------------
+# Search index
+#------------------------------------------------------------------------
+
+# One index over every code table. Names are matched case-insensitively by
+# whole-name prefix or by word prefixes in any order, and codes by prefix.
+class SearchIndex:
+    def __init__(self, tables):
+        types, names, codes = [], [], []
+        for entity_type, (names_column, codes_column) in tables.items():
+            # Rows repeated in a code table are listed once
+            table = pd.DataFrame({'name': names_column.to_numpy(), 'code': codes_column.astype(str).to_numpy()})
+            table = table.dropna(subset=['name']).drop_duplicates()
+            types.append(np.full(len(table), entity_type, dtype=object))
+            names.append(table['name'].to_numpy(dtype=object))
+            codes.append(table['code'].to_numpy(dtype=object))
+        self.types = np.concatenate(types)
+        self.names = np.concatenate(names)
+        self.codes = np.concatenate(codes)
+        normalized = fuzzy.normalize_names(self.names)
+
+        # Sorted whole names
+        self._name_order = np.argsort(normalized.to_numpy(dtype=str), kind='stable')
+        self._sorted_names = normalized.to_numpy(dtype=str)[self._name_order]
+
+        # Sorted (word, entry) pairs
+        words = normalized.str.split().explode().dropna()
+        words = words[words != '']
+        word_order = np.argsort(words.to_numpy(dtype=str), kind='stable')
+        self._sorted_words = words.to_numpy(dtype=str)[word_order]
+        self._word_entries = words.index.to_numpy()[word_order]
+
+        # Sorted codes, with leading zeros removed so "00123" and "123" find the same entry
+        stripped = pd.Series(self.codes, dtype=str).str.lstrip('0')
+        self._code_order = np.argsort(stripped.to_numpy(dtype=str), kind='stable')
+        self._sorted_codes = stripped.to_numpy(dtype=str)[self._code_order]
+
+        self._lengths = np.array([len(name) for name in self.names])
+
+    # Ranked entries for a search string, optionally putting one entity type first on ties
+    def search(self, query, prefer=None, limit=MAX_RESULTS):
+        normalized = fuzzy.normalize_names([query]).iloc[0]
+        scores = np.zeros(len(self.names), dtype=np.int8)
+
+        if normalized:
+            # Whole-name prefix, and exact names
+            lo, hi = _prefix_range(self._sorted_names, normalized)
+            entries = self._name_order[lo:hi]
+            scores[entries] = np.where(self._sorted_names[lo:hi] == normalized, EXACT, NAME_PREFIX)
+
+            # Every word of the search string starts a word of the name
+            found = None
+            for word in normalized.split():
+                lo, hi = _prefix_range(self._sorted_words, word)
+                entries = np.unique(self._word_entries[lo:hi])
+                found = entries if found is None else np.intersect1d(found, entries, assume_unique=True)
+            scores[found] = np.maximum(scores[found], WORD_PREFIX)
+
+        # Codes, for search strings made of digits (or alphanumeric codes)
+        code = query.strip().lstrip('0').upper()
+        if code and code.replace('-', '').isalnum():
+            lo, hi = _prefix_range(self._sorted_codes, code)
+            entries = self._code_order[lo:hi]
+            code_scores = np.where(self._sorted_codes[lo:hi] == code, EXACT, CODE_PREFIX)
+            scores[entries] = np.maximum(scores[entries], code_scores)
+
+        # Best match first, then the preferred entity type, then shorter names
+        hits = np.flatnonzero(scores)
+        preferred = self.types[hits] != prefer
+        order = np.lexsort((self.names[hits], self._lengths[hits], preferred, -scores[hits]))
+        hits = hits[order][:limit]
+
+        return pd.DataFrame({
+            'Type': self.types[hits],
+            'Name': self.names[hits],
+            'Code': self.codes[hits],
+        })
+
+    def memory_usage(self):
+        arrays = [self.types, self.names, self.codes, self._sorted_names, self._name_order, self._sorted_words,
+                  self._word_entries, self._sorted_codes, self._code_order, self._lengths]
+        return int(sum(array.nbytes for array in arrays) + sum(len(name) for name in self.names) * 2)
+
+# Load the search index over every code table once per process
+def load_search_index():
+    def build():
+        tables = {}
+        for entity, (_, name_column, code_column) in matching.CODE_TABLES.items():
+            table = matching.load_code_table(entity)
+            tables[name_column] = (table[name_column], table[code_column])
+        return SearchIndex(tables)
+
+    return reference.load_derived('search', 'all', build)
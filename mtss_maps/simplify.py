@@ -0,0 +1,71 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+
+from mtss_maps import codes, reference
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Simplification pyramid: tolerance of each level, in degrees
+LEVELS = {
+    'full': 0.0,
+    'fine': 0.0005,
+    'medium': 0.002,
+    'coarse': 0.005,
+}
+
+# Extra zoom levels a map is expected to be viewed at beyond its initial zoom.
+# The live map is re-rendered when needed, the downloaded HTML is zoomed in offline.
+TARGET_ZOOM_MARGIN = {
+    'live': 0,
+    'html': 3,
+}
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Topology-preserving simplification of a polygon coverage. The boundary files are not
+# exact coverages: neighbors' shared borders do not always have the same vertices, which
+# coverage simplification would pull apart into gaps and overlaps. The coverage is cleaned
+# first, so every shared border is one edge and is simplified the same way on both sides.
+def simplify_coverage(geometries, tolerance):
+    if tolerance <= 0:
+        return geometries
+    return shapely.coverage_simplify(shapely.coverage_clean(geometries), tolerance)
+
+# Load one level of the simplification pyramid for a reference layer.
+# Levels are built once per process and cached next to the layer itself.
+def load_level(name, level):
+    if LEVELS[level] <= 0:
+        return reference.load_layer(name)
+
+    def build():
+        layer = reference.load_layer(name)
+        geometries = simplify_coverage(layer.geometry.values.to_numpy(), LEVELS[level])
+        return layer.set_geometry(gpd.GeoSeries(geometries, index=layer.index, crs=layer.crs))
+
+    return reference.load_derived(name, level, build)
+
+# Coarsest level whose tolerance stays under half a screen pixel at the given zoom
+def level_for(zoom, target='live'):
+    zoom = zoom + TARGET_ZOOM_MARGIN[target]
+    half_pixel = 360 / (256 * 2 ** zoom) / 2
+    candidates = [level for level, tolerance in LEVELS.items() if tolerance <= half_pixel]
+    return max(candidates, key=LEVELS.get)
+
+# Swap the geometry of a merged frame for the same features from a simplified level
+def with_level(combined, name, level):
+    if LEVELS[level] <= 0:
+        return combined
+    simplified = load_level(name, level)
+    first = ~simplified[codes.KEY].duplicated().to_numpy()
+    geometry = pd.Series(simplified.geometry.values[first], index=simplified[codes.KEY][first])
+    geometry = geometry.reindex(combined[codes.KEY]).values
+    return combined.set_geometry(gpd.GeoSeries(geometry, index=combined.index, crs=simplified.crs))
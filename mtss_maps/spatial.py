@@ -0,0 +1,100 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from mtss_maps import codes, ingest, perf, pipeline, reference
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Accepted names of the coordinate columns of a point upload, compared case-insensitively
+LATITUDE_COLUMNS = ('latitude', 'lat')
+LONGITUDE_COLUMNS = ('longitude', 'lon', 'lng', 'long')
+
+# Column holding the number of points that fell in each boundary
+POINTS = 'Points'
+
+#------------------------------------------------------------------------
+# Polygon index
+#------------------------------------------------------------------------
+
+# Spatial index of a boundary layer, with the code key of each polygon.
+# Built once per process and shared by every point upload.
+class PolygonIndex:
+    def __init__(self, layer):
+        geometries = layer.geometry.values.to_numpy()
+        shapely.prepare(geometries)
+        self.tree = shapely.STRtree(geometries)
+        self.keys = layer[codes.KEY].to_numpy(dtype='int64', na_value=-1)
+
+    def memory_usage(self):
+        return int(self.keys.nbytes + self.tree.geometries.nbytes)
+
+# Load the spatial index of a boundary layer once per process
+def load_index(name):
+    return reference.load_derived(name, 'strtree', lambda: PolygonIndex(reference.load_layer(name)))
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Position of the polygon of a boundary layer holding each point, in one vectorized
+# query of the layer's index. -1 for points outside every polygon or without coordinates.
+# A point on a shared border goes to the first polygon found.
+def locate(name, longitude, latitude):
+    longitude = np.asarray(longitude, dtype=float)
+    latitude = np.asarray(latitude, dtype=float)
+    valid = np.flatnonzero(np.isfinite(longitude) & np.isfinite(latitude))
+    located = np.full(len(longitude), -1, dtype=np.int64)
+
+    index = load_index(name)
+    with perf.span('locate', layer=name, rows=len(longitude)):
+        point_index, polygon_index = index.tree.query(shapely.points(longitude[valid], latitude[valid]), predicate='intersects')
+        _, first = np.unique(point_index, return_index=True)
+        located[valid[point_index[first]]] = polygon_index[first]
+    return located
+
+# Longitude and latitude columns of a point upload, as float arrays. Only the two
+# coordinate columns are read. Raises ValueError when the upload has no recognizable
+# coordinate columns or is over the upload limits.
+def read_coordinates(source, filename=None):
+    _, header = ingest.read_headers(source, filename)[0]
+    columns = {str(column).strip().lower(): column for column in header}
+    latitude = next((columns[name] for name in LATITUDE_COLUMNS if name in columns), None)
+    longitude = next((columns[name] for name in LONGITUDE_COLUMNS if name in columns), None)
+    if latitude is None or longitude is None:
+        raise ValueError("The uploaded file must contain 'Latitude' and 'Longitude' columns.")
+
+    df = ingest.read_columns(source, filename, [longitude, latitude])
+    return (
+        pd.to_numeric(df[longitude], errors='coerce').to_numpy(dtype=float),
+        pd.to_numeric(df[latitude], errors='coerce').to_numpy(dtype=float),
+    )
+
+# Count the points in each boundary of an entity. Returns a table shaped like a code
+# upload (name, code, code key and "Count"), one row per boundary holding at least one
+# point with the number of points in the "Points" column, and the number of points
+# outside every boundary.
+def aggregate(entity, longitude, latitude):
+    spec = pipeline.MAP_MAKERS[entity]
+    layer = reference.load_layer(spec['layer'])
+    located = locate(spec['layer'], longitude, latitude)
+    counts = np.bincount(located[located >= 0], minlength=len(layer))
+
+    # Polygons sharing a code are counted together
+    held = counts > 0
+    table = pd.DataFrame({
+        spec['name_column']: layer[spec['name_column']].to_numpy()[held],
+        spec['code_column']: layer[spec['code_column']].to_numpy()[held],
+        codes.KEY: layer[codes.KEY].to_numpy()[held],
+        POINTS: counts[held],
+    })
+    table = table.groupby(codes.KEY, as_index=False, sort=False).agg({spec['name_column']: 'first', spec['code_column']: 'first', POINTS: 'sum'})
+    table[codes.KEY] = table[codes.KEY].astype(layer[codes.KEY].dtype)
+    table['Count'] = 1
+    return table, int((located < 0).sum())
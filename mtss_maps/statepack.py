@@ -0,0 +1,323 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import argparse
+import hashlib
+import json
+import os
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Version of the pack layout; packs written with another version are ignored
+FORMAT_VERSION = 2
+
+# The state pack the app loads from. Point MTSS_STATE_PACK at another
+# directory to serve a different state's reference data.
+DEFAULT_STATE = 'michigan'
+PACK_DIR = Path(os.environ.get('MTSS_STATE_PACK', Path(__file__).resolve().parent.parent / 'statepack' / DEFAULT_STATE))
+
+MANIFEST = 'manifest.json'
+
+# Load the pack from its memory-mapped columns rather than its Parquet files.
+# Worker processes on one host then share the read-only pages of the numeric and
+# code key columns, and start without decoding Parquet. Only those columns are shared:
+# text columns and geometries are rebuilt as Python and GEOS objects in each process,
+# so each extra worker still holds its own copy of them.
+MMAP = os.environ.get('MTSS_STATE_PACK_MMAP', '') not in ('', '0')
+
+# Parsed manifests, keyed by path and modification time so a rebuilt pack is picked up
+_manifests = {}
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# SHA-256 of a file, read in chunks
+def checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Checksum, size and modification time of a file written to the pack. The checksum is
+# verified by --check; loads only compare the size and time, so they read nothing.
+def _file_record(path):
+    stat = path.stat()
+    return {'sha256': checksum(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+# Whether a pack file is still the one the manifest describes, from its size and time
+def _unchanged(path, record):
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return False
+    return stat.st_size == record['size'] and stat.st_mtime_ns == record['mtime_ns']
+
+# The pack manifest, or None when there is no pack of the current format version
+def load_manifest(pack_dir=PACK_DIR):
+    path = Path(pack_dir) / MANIFEST
+    try:
+        key = (path, path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    if key not in _manifests:
+        _manifests[key] = json.loads(path.read_text())
+    manifest = _manifests[key]
+    if manifest.get('format') != FORMAT_VERSION:
+        return None
+    return manifest
+
+# Whether the pack holds an entry, such as ('layers', 'district') or ('codes', 'school')
+def has_entry(kind, name, pack_dir=PACK_DIR):
+    manifest = load_manifest(pack_dir)
+    return manifest is not None and f'{kind}/{name}' in manifest['entries']
+
+# Read one entry of the pack. Returns None, with a warning, when there is no pack, the
+# pack does not hold the entry or its file changed since the build, so the caller can
+# fall back to the source file.
+def read_entry(kind, name, pack_dir=PACK_DIR):
+    manifest = load_manifest(pack_dir)
+    if manifest is None:
+        warnings.warn(f'No state pack in {pack_dir}; reading {kind}/{name} from its source file. Build the pack with python -m mtss_maps.statepack.')
+        return None
+    entry = manifest['entries'].get(f'{kind}/{name}')
+    if entry is None:
+        warnings.warn(f'State pack has no entry {kind}/{name}; reading the source file instead.')
+        return None
+
+    if MMAP and 'mapped' in entry:
+        return _read_mapped(Path(pack_dir), kind, name, entry['mapped'])
+
+    path = Path(pack_dir) / entry['file']
+    if not _unchanged(path, entry):
+        warnings.warn(f'State pack entry {kind}/{name} is missing or changed since the build; reading the source file instead.')
+        return None
+
+    if entry['geometry']:
+        # Code tables are read without the geospatial libraries; only layers import them
+        import geopandas as gpd
+        return gpd.read_parquet(path)
+    return pd.read_parquet(path)
+
+#------------------------------------------------------------------------
+# Memory-mapped columns
+#------------------------------------------------------------------------
+
+# Flat column files of one table: every column is one or two .npy arrays
+# (values and a missing-value mask), and the geometry is stored as the
+# coordinate and offset arrays of shapely's ragged layout.
+def _write_mapped(pack_dir, kind, name, table):
+    import geopandas as gpd
+    import shapely
+
+    directory = f'mapped/{kind}/{name}'
+    (pack_dir / directory).mkdir(parents=True, exist_ok=True)
+    arrays, columns = {}, []
+
+    for column in table.columns:
+        values = table[column]
+        if isinstance(table, gpd.GeoDataFrame) and column == table.geometry.name:
+            continue
+        prefix = f'column{len(columns)}'
+        if isinstance(values.dtype, pd.api.extensions.ExtensionDtype) and values.dtype.kind in 'iuf':
+            arrays[f'{prefix}.values'] = values.to_numpy(dtype=values.dtype.numpy_dtype, na_value=0)
+            arrays[f'{prefix}.mask'] = values.isna().to_numpy()
+            columns.append({'name': column, 'file': prefix, 'kind': 'masked', 'dtype': str(values.dtype)})
+        elif values.dtype.kind in 'biuf':
+            arrays[f'{prefix}.values'] = values.to_numpy()
+            columns.append({'name': column, 'file': prefix, 'kind': 'plain', 'dtype': str(values.dtype)})
+        else:
+            # Text as fixed-width unicode, which numpy can map without a pickle
+            arrays[f'{prefix}.values'] = values.fillna('').astype(str).to_numpy(dtype=str)
+            arrays[f'{prefix}.mask'] = values.isna().to_numpy()
+            columns.append({'name': column, 'file': prefix, 'kind': 'text', 'dtype': 'object'})
+
+    layout = {'order': list(table.columns), 'columns': columns, 'geometry': None}
+    if isinstance(table, gpd.GeoDataFrame):
+        geometry = table.geometry.values
+        missing = shapely.is_missing(geometry)
+        layout['geometry'] = {'name': table.geometry.name, 'crs': table.crs.to_string() if table.crs else None, 'type': None, 'offsets': 0}
+        arrays['geometry.missing'] = missing
+        if not missing.all():
+            geometry_type, coordinates, offsets = shapely.to_ragged_array(geometry[~missing])
+            arrays['geometry.coordinates'] = coordinates
+            for level, offset in enumerate(offsets):
+                arrays[f'geometry.offsets{level}'] = offset
+            # Mixed Polygon/MultiPolygon layers are stored as multi parts; remember the single ones
+            arrays['geometry.single'] = shapely.get_type_id(geometry[~missing]) < int(geometry_type)
+            layout['geometry'].update(type=int(geometry_type), offsets=len(offsets))
+
+    files = {}
+    for file, array in arrays.items():
+        path = pack_dir / directory / f'{file}.npy'
+        np.save(path, np.ascontiguousarray(array), allow_pickle=False)
+        files[f'{file}.npy'] = _file_record(path)
+    (pack_dir / directory / 'layout.json').write_text(json.dumps(layout, indent=2))
+    return {'dir': directory, 'files': files}
+
+# Rebuild a table from its memory-mapped columns. Numeric and code key columns keep
+# pointing at the mapped pages, which are only read when used. Text and geometry are
+# materialized in each process: pandas holds text as Python strings and shapely builds
+# GEOS geometries, neither of which can live in a shared file.
+def _read_mapped(pack_dir, kind, name, mapped):
+    directory = pack_dir / mapped['dir']
+    for file, record in mapped['files'].items():
+        if not _unchanged(directory / file, record):
+            warnings.warn(f'State pack entry {kind}/{name} is missing or changed since the build; reading the source file instead.')
+            return None
+
+    def load(file):
+        return np.load(directory / f'{file}.npy', mmap_mode='r', allow_pickle=False)
+
+    layout = json.loads((directory / 'layout.json').read_text())
+    data = {}
+    for column in layout['columns']:
+        values = load(f"{column['file']}.values")
+        if column['kind'] == 'masked':
+            array_type = pd.arrays.IntegerArray if values.dtype.kind in 'iu' else pd.arrays.FloatingArray
+            data[column['name']] = array_type(values, load(f"{column['file']}.mask"))
+        elif column['kind'] == 'plain':
+            data[column['name']] = values
+        else:
+            data[column['name']] = np.where(load(f"{column['file']}.mask"), None, values.astype(object))
+    table = pd.DataFrame(data, copy=False)
+
+    spec = layout['geometry']
+    if spec is None:
+        return table
+
+    import geopandas as gpd
+    import shapely
+    missing = load('geometry.missing')
+    geometry = np.full(len(missing), None, dtype=object)
+    if spec['type'] is not None:
+        offsets = tuple(load(f'geometry.offsets{level}') for level in range(spec['offsets']))
+        parts = shapely.from_ragged_array(shapely.GeometryType(spec['type']), load('geometry.coordinates'), offsets)
+        single = load('geometry.single')
+        parts[single] = shapely.get_geometry(parts[single], 0)
+        geometry[~missing] = parts
+    table[spec['name']] = gpd.GeoSeries(geometry, crs=spec['crs'])
+    return gpd.GeoDataFrame(table[layout['order']], geometry=spec['name'], crs=spec['crs'])
+
+#------------------------------------------------------------------------
+# Build
+#------------------------------------------------------------------------
+
+# Write one table to the pack and describe it for the manifest
+def _write_entry(pack_dir, kind, name, table, root, source):
+    file = f'{kind}/{name}.parquet'
+    path = pack_dir / file
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    geometry = hasattr(table, 'geometry')
+    if geometry:
+        # Point layers read from CSV carry an empty geometry column, whose bounds warn
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            table.to_parquet(path, index=False)
+    else:
+        table.to_parquet(path, index=False)
+
+    return {
+        'file': file,
+        **_file_record(path),
+        'rows': len(table),
+        'geometry': geometry,
+        'mapped': _write_mapped(pack_dir, kind, name, table),
+        'source': source,
+        'source_sha256': checksum(root / source),
+    }
+
+# Compile every reference layer and code table found on disk into a pack:
+# normalized code keys, only the columns the pages use, and a checksummed manifest
+def build_pack(pack_dir=PACK_DIR, state=DEFAULT_STATE):
+    # The readers live in modules that themselves load from the pack
+    from mtss_maps import matching, reference, rollup
+
+    pack_dir = Path(pack_dir)
+    entries = {}
+    for name, spec in reference.LAYERS.items():
+        if (reference.ROOT / spec['path']).exists():
+            layer = reference._read_source_layer(name)
+            entries[f'layers/{name}'] = _write_entry(pack_dir, 'layers', name, layer, reference.ROOT, spec['path'])
+    for entity, (path, _, _) in matching.CODE_TABLES.items():
+        if (reference.ROOT / path).exists():
+            table = matching._read_source_table(entity)
+            entries[f'codes/{entity}'] = _write_entry(pack_dir, 'codes', entity, table, reference.ROOT, path)
+    if (reference.ROOT / rollup.SOURCE).exists():
+        index = rollup._read_source_index()
+        entries['indexes/school'] = _write_entry(pack_dir, 'indexes', 'school', index, reference.ROOT, rollup.SOURCE)
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'state': state,
+        'built': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'entries': entries,
+    }
+    (pack_dir / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+# Entries whose files no longer match their checksums, read in full
+def corrupt_entries(pack_dir=PACK_DIR):
+    manifest = load_manifest(pack_dir)
+    if manifest is None:
+        return []
+    pack_dir = Path(pack_dir)
+    corrupt = []
+    for key, entry in manifest['entries'].items():
+        files = [(pack_dir / entry['file'], entry['sha256'])]
+        if 'mapped' in entry:
+            directory = pack_dir / entry['mapped']['dir']
+            files += [(directory / file, record['sha256']) for file, record in entry['mapped']['files'].items()]
+        if any(not path.exists() or checksum(path) != digest for path, digest in files):
+            corrupt.append(key)
+    return corrupt
+
+# Entries whose source file has changed since the pack was built
+def stale_entries(pack_dir=PACK_DIR):
+    from mtss_maps import reference
+
+    manifest = load_manifest(pack_dir)
+    if manifest is None:
+        return []
+    stale = []
+    for key, entry in manifest['entries'].items():
+        source = reference.ROOT / entry['source']
+        if not source.exists() or checksum(source) != entry['source_sha256']:
+            stale.append(key)
+    return stale
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile the reference layers and code tables into a state pack.')
+    parser.add_argument('--out', type=Path, default=PACK_DIR, help=f'pack directory (default: {PACK_DIR})')
+    parser.add_argument('--state', default=DEFAULT_STATE)
+    parser.add_argument('--check', action='store_true', help='only report entries whose files fail their checksums or whose source file changed since the build')
+    args = parser.parse_args()
+
+    if args.check:
+        if load_manifest(args.out) is None:
+            parser.exit(1, f'No state pack in {args.out}\n')
+        corrupt = corrupt_entries(args.out)
+        stale = stale_entries(args.out)
+        for key in corrupt:
+            print(f'{key}: corrupt')
+        for key in stale:
+            print(f'{key}: stale')
+        parser.exit(1 if corrupt or stale else 0, '' if corrupt or stale else 'State pack is up to date\n')
+
+    manifest = build_pack(args.out, args.state)
+    for key, entry in manifest['entries'].items():
+        print(f"{key}: {entry['rows']} rows written to {args.out / entry['file']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import json
+
+import folium
+from branca.element import Figure, MacroElement
+from jinja2 import Template
+
+from mtss_maps import choropleth, perf, pipeline, reference, simplify, topology
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Slots of a map template, filled for each upload, in the order they appear in the page
+SLOTS = ('header', 'classes', 'styles', 'legend')
+
+# Marker left in the rendered template where a slot is filled in
+MARKER = '@@mtss-{}@@'
+
+#------------------------------------------------------------------------
+# Map elements
+#------------------------------------------------------------------------
+
+# Styles the features of a boundary layer by the class of their code. The code -> class
+# table and the class styles are template slots, so each map only fills them in.
+class CodeClassStyles(MacroElement):
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }}_classes = """ + MARKER.format('classes') + """;
+        var {{ this.get_name() }}_styles = """ + MARKER.format('styles') + """;
+        {{ this._parent.get_name() }}.options.style = function(feature) {
+            return {{ this.get_name() }}_styles[{{ this.get_name() }}_classes[feature.properties[{{ this.property|tojson }}]] || 0];
+        };
+        {{ this._parent.get_name() }}.setStyle({{ this._parent.get_name() }}.options.style);
+        {% endmacro %}
+    """)
+
+    def __init__(self, property):
+        super().__init__()
+        self._name = 'CodeClassStyles'
+        self.property = property
+
+# Place in the map script where the legend of a map is drawn, when it has one
+class LegendSlot(MacroElement):
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}""" + MARKER.format('legend') + """{% endmacro %}
+    """)
+
+    def __init__(self):
+        super().__init__()
+        self._name = 'LegendSlot'
+
+#------------------------------------------------------------------------
+# Templates
+#------------------------------------------------------------------------
+
+# HTML map of a boundary entity with every feature's geometry, name and code, the
+# Michigan border and the base layers rendered once. The page is kept split at its
+# slots; a map of an upload is the parts joined with the upload's classes and styles.
+class MapTemplate:
+    def __init__(self, entity, target='html', encoding=None):
+        spec = pipeline.MAP_MAKERS[entity]
+        name, code = spec['name_column'], spec['code_column']
+        encoding = encoding or pipeline.ENCODING
+        level = simplify.level_for(pipeline.ZOOM, target=target)
+
+        # Every feature of the layer, carrying its name for the tooltip and its code for the styles
+        tooltip = folium.GeoJsonTooltip(fields=[name], aliases=[f"{name}: "])
+        if encoding == 'topojson':
+            layer = topology.load_topology(spec['layer'], level)
+            records = simplify.load_level(spec['layer'], level)[[name, code]].to_dict('records')
+            features = topology.TopoJsonLayer(layer.encode(range(len(records)), records), name=f'{name}s', tooltip=tooltip)
+        else:
+            layer = simplify.load_level(spec['layer'], level)
+            features = folium.GeoJson(
+                {'type': 'FeatureCollection', 'features': list(layer[[name, code, layer.geometry.name]].iterfeatures(drop_id=True))},
+                name=f'{name}s',
+                tooltip=tooltip,
+            )
+        CodeClassStyles(code).add_to(features)
+
+        m = folium.Map(location=pipeline.CENTER, zoom_start=pipeline.ZOOM)
+        features.add_to(m)
+        LegendSlot().add_to(m)
+        pipeline.add_border(m, encoding)
+
+        html = m.get_root().render().replace('</head>', MARKER.format('header') + '</head>', 1)
+        self.parts = []
+        for slot in SLOTS:
+            part, html = html.split(MARKER.format(slot), 1)
+            self.parts.append(part)
+        self.parts.append(html)
+
+        self.code_column = code
+        self.map_name = (m._name, m._id)
+
+    # HTML of the map of a combined layer, colored by its classification
+    def fill(self, combined, classification):
+        legend = classification.legend()
+        header, script = self._legend(legend) if legend is not None else ('', '')
+        values = (
+            header,
+            json.dumps(classification.by_code(combined[self.code_column])),
+            json.dumps(classification.styles),
+            script,
+        )
+        return ''.join(part for pair in zip(self.parts, values + ('',)) for part in pair)
+
+    # Script of a legend drawn on the template's map, and the header links it needs
+    def _legend(self, legend):
+        figure = Figure()
+        anchor = MacroElement()
+        anchor._name, anchor._id = self.map_name
+        figure.add_child(anchor)
+        legend.add_to(anchor)
+        legend.render()
+        header = ''.join(element.render() for name, element in figure.header._children.items() if name == 'd3')
+        return header, figure.script.render()
+
+    def memory_usage(self):
+        return int(sum(len(part) for part in self.parts))
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Load the map template of a boundary entity once per process
+def load_template(entity, target='html', encoding=None):
+    encoding = encoding or pipeline.ENCODING
+    variant = f'template-{target}-{encoding}-{topology.PRECISION}'
+    return reference.load_derived(pipeline.MAP_MAKERS[entity]['layer'], variant, lambda: MapTemplate(entity, target, encoding))
+
+# HTML download of a boundary map: the entity's template filled with the classes of an
+# upload. Boundaries are colored by a classification, by default matched versus unmatched.
+def export_html(entity, combined, classification=None, target='html'):
+    spec = pipeline.MAP_MAKERS[entity]
+    template = load_template(entity, target)
+    with perf.span('template', entity=entity, target=target) as record:
+        classification = classification or choropleth.classify(combined, spec['color'])
+        html = template.fill(combined, classification)
+        record['bytes'] = len(html)
+    return html
@@ -0,0 +1,238 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import argparse
+import json
+import math
+import shutil
+import urllib.request
+
+import shapely
+from branca.element import Figure, JavascriptLink, MacroElement
+from jinja2 import Template
+
+from mtss_maps import reference, simplify
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Pre-cut tiles are written under Streamlit's static folder (server.enableStaticServing)
+TILES_DIR = reference.ROOT / 'static' / 'tiles'
+
+# URL the browser fetches tiles from
+TILES_URL = '/app/static/tiles/{name}/{{z}}/{{x}}/{{y}}.pbf'
+
+# Zoom levels that are pre-cut; the browser over-zooms the deepest level
+MIN_ZOOM = 5
+MAX_ZOOM = 12
+
+# Tile grid resolution and buffer around each tile, in tile units
+EXTENT = 4096
+BUFFER = 64
+
+# Half the width of the Web Mercator world, in meters
+WORLD = 20037508.342789244
+
+# Name columns carried into the tiles next to the code column
+NAME_COLUMNS = {
+    'district': 'District',
+    'isd': 'ISD',
+}
+
+# Leaflet.VectorGrid, fetched once at build time and served from the static folder next to
+# the tiles, so the maps never load it from a CDN
+VECTOR_GRID_SOURCE = 'https://unpkg.com/leaflet.vectorgrid@1.3.0/dist/Leaflet.VectorGrid.bundled.min.js'
+VECTOR_GRID_FILE = TILES_DIR / 'leaflet.vectorgrid-1.3.0.bundled.min.js'
+VECTOR_GRID_JS = f'/app/static/tiles/{VECTOR_GRID_FILE.name}'
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Directory holding the pre-cut tiles of a layer
+def tiles_path(name):
+    return TILES_DIR / name
+
+# Whether tiles have been built for a layer, along with the script that draws them
+def tiles_available(name):
+    return (tiles_path(name) / 'metadata.json').exists() and VECTOR_GRID_FILE.exists()
+
+# Fetch the VectorGrid script into the static folder, unless it is already there
+def fetch_vector_grid():
+    if VECTOR_GRID_FILE.exists():
+        return
+    with urllib.request.urlopen(VECTOR_GRID_SOURCE, timeout=60) as response:
+        script = response.read()
+    VECTOR_GRID_FILE.parent.mkdir(parents=True, exist_ok=True)
+    VECTOR_GRID_FILE.write_bytes(script)
+
+# Web Mercator bounds of a tile, in meters
+def tile_bounds(z, x, y):
+    size = 2 * WORLD / 2 ** z
+    minx = -WORLD + x * size
+    maxy = WORLD - y * size
+    return minx, maxy - size, minx + size, maxy
+
+# Range of tile columns and rows covering a longitude/latitude box
+def tile_range(bounds, z):
+    minx, miny, maxx, maxy = bounds
+
+    def tile(lon, lat):
+        n = 2 ** z
+        x = int((lon + 180) / 360 * n)
+        y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+        return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+    x0, y0 = tile(minx, maxy)
+    x1, y1 = tile(maxx, miny)
+    return range(x0, x1 + 1), range(y0, y1 + 1)
+
+# Cut a boundary layer into Mapbox Vector Tiles, one file per tile. Tiles of an
+# earlier build are removed first, so none are left over from another zoom range.
+def build_tiles(name, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    # Encoding vector tiles is only needed for this build step
+    import mapbox_vector_tile
+
+    shutil.rmtree(tiles_path(name), ignore_errors=True)
+    tiles_path(name).mkdir(parents=True)
+
+    code_column = reference.LAYERS[name]['code_column']
+    name_column = NAME_COLUMNS[name]
+    bounds = reference.load_layer(name).total_bounds
+    written = 0
+
+    for z in range(min_zoom, max_zoom + 1):
+        # Use the simplification level that suits this zoom, projected to Web Mercator
+        layer = simplify.load_level(name, simplify.level_for(z)).to_crs(3857)
+        geometries = layer.geometry.values.to_numpy()
+        tree = shapely.STRtree(geometries)
+        properties = layer[[code_column, name_column]].to_dict('records')
+
+        xs, ys = tile_range(bounds, z)
+        for x in xs:
+            for y in ys:
+                minx, miny, maxx, maxy = tile_bounds(z, x, y)
+                margin = (maxx - minx) * BUFFER / EXTENT
+                clip_box = (minx - margin, miny - margin, maxx + margin, maxy + margin)
+
+                hits = tree.query(shapely.box(*clip_box), predicate='intersects')
+                if not len(hits):
+                    continue
+
+                clipped = shapely.clip_by_rect(geometries[hits], *clip_box)
+                features = [
+                    {'geometry': geometry, 'properties': properties[index]}
+                    for index, geometry in zip(hits, clipped)
+                    if not geometry.is_empty
+                ]
+                if not features:
+                    continue
+
+                data = mapbox_vector_tile.encode(
+                    [{'name': name, 'features': features}],
+                    default_options={'quantize_bounds': (minx, miny, maxx, maxy), 'extents': EXTENT},
+                )
+                tile_file = tiles_path(name) / str(z) / str(x) / f'{y}.pbf'
+                tile_file.parent.mkdir(parents=True, exist_ok=True)
+                tile_file.write_bytes(data)
+                written += 1
+
+    metadata = {
+        'layer': name,
+        'code_property': code_column,
+        'name_property': name_column,
+        'min_zoom': min_zoom,
+        'max_zoom': max_zoom,
+        'tiles': written,
+    }
+    (tiles_path(name) / 'metadata.json').write_text(json.dumps(metadata, indent=2))
+    return metadata
+
+# Tile build settings written next to a layer's tiles
+def load_metadata(name):
+    return json.loads((tiles_path(name) / 'metadata.json').read_text())
+
+#------------------------------------------------------------------------
+# Map element
+#------------------------------------------------------------------------
+
+# Boundary layer drawn from pre-cut vector tiles. Only the code -> class
+# table and one style per class are embedded in the page; features are
+# styled in the browser by looking up their code in it.
+class CodeJoinedVectorTiles(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var {{ this.get_name() }}_classes = {{ this.classes|tojson }};
+        var {{ this.get_name() }}_styles = {{ this.styles|tojson }};
+        var {{ this.get_name() }} = L.vectorGrid.protobuf({{ this.url|tojson }}, {
+            rendererFactory: L.canvas.tile,
+            interactive: true,
+            minNativeZoom: {{ this.min_zoom }},
+            maxNativeZoom: {{ this.max_zoom }},
+            vectorTileLayerStyles: {
+                {{ this.layer|tojson }}: function(properties, zoom) {
+                    var cls = {{ this.get_name() }}_classes[properties[{{ this.code_property|tojson }}]] || 0;
+                    return {{ this.get_name() }}_styles[cls];
+                }
+            }
+        }).addTo({{ this._parent.get_name() }});
+        {{ this.get_name() }}.on('click', function(e) {
+            L.popup()
+                .setLatLng(e.latlng)
+                .setContent({{ this.label|tojson }} + e.layer.properties[{{ this.name_property|tojson }}])
+                .openOn({{ this._parent.get_name() }});
+        });
+        {% endmacro %}
+    """)
+
+    def __init__(self, name, classes, styles, label):
+        super().__init__()
+        self._name = 'CodeJoinedVectorTiles'
+        metadata = load_metadata(name)
+        self.url = TILES_URL.format(name=name)
+        self.layer = metadata['layer']
+        self.code_property = metadata['code_property']
+        self.name_property = metadata['name_property']
+        self.min_zoom = metadata['min_zoom']
+        self.max_zoom = metadata['max_zoom']
+        self.classes = classes
+        self.styles = [dict(style, fill=True) for style in styles]
+        self.label = label
+
+    def render(self, **kwargs):
+        super().render(**kwargs)
+        figure = self.get_root()
+        assert isinstance(figure, Figure), 'You cannot render this Element if it is not in a Figure.'
+        figure.header.add_child(JavascriptLink(VECTOR_GRID_JS), name='leaflet_vectorgrid')
+
+#------------------------------------------------------------------------
+# Command line
+#------------------------------------------------------------------------
+
+# Build tiles from the command line: python -m mtss_maps.tiles district isd
+def main():
+    parser = argparse.ArgumentParser(description='Cut boundary layers into Mapbox Vector Tiles.')
+    parser.add_argument('layers', nargs='*', help=f"layers to build: {', '.join(NAME_COLUMNS)} (default: all)")
+    parser.add_argument('--min-zoom', type=int, default=MIN_ZOOM)
+    parser.add_argument('--max-zoom', type=int, default=MAX_ZOOM)
+    parser.add_argument('--missing', action='store_true', help='only build layers that have no tiles yet')
+    args = parser.parse_args()
+
+    unknown = [name for name in args.layers if name not in NAME_COLUMNS]
+    if unknown:
+        parser.error(f"unknown layer(s): {', '.join(unknown)}")
+
+    fetch_vector_grid()
+    print(f"VectorGrid script in {VECTOR_GRID_FILE}")
+
+    for name in args.layers or list(NAME_COLUMNS):
+        if args.missing and (tiles_path(name) / 'metadata.json').exists():
+            print(f"{name}: tiles already built in {tiles_path(name)}")
+            continue
+        metadata = build_tiles(name, args.min_zoom, args.max_zoom)
+        print(f"{name}: {metadata['tiles']} tiles written to {tiles_path(name)}")
+
+if __name__ == '__main__':
+    main()
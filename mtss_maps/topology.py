@@ -0,0 +1,207 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import os
+
+import folium
+import numpy as np
+import pandas as pd
+import shapely
+from jinja2 import Template
+from jinja2.utils import htmlsafe_json_dumps
+
+from mtss_maps import choropleth, codes, reference, simplify
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Decimal places of longitude and latitude kept in TopoJSON payloads. Five places is about
+# a meter, far below a screen pixel at the zoom levels the maps are viewed at.
+# Eight places (about a millimeter) is the most a topology is built at.
+MAX_PRECISION = 8
+PRECISION = int(os.environ.get('MTSS_MAP_PRECISION', '5'))
+if not 0 <= PRECISION <= MAX_PRECISION:
+    raise ValueError(f'MTSS_MAP_PRECISION must be between 0 and {MAX_PRECISION}, not {PRECISION}.')
+
+# Name of the object holding the features of every topology
+OBJECT = 'features'
+
+#------------------------------------------------------------------------
+# Topology
+#------------------------------------------------------------------------
+
+# TopoJSON arcs of a polygon layer: coordinates quantized to the given precision,
+# every border shared by two neighbors stored once, and each arc delta-encoded.
+# Built once per process and level; every map then only attaches its properties.
+class Topology:
+    def __init__(self, geometries, keys=None, precision=PRECISION):
+        self.keys = keys
+        scale = 10.0 ** -precision
+        translate = shapely.total_bounds(geometries)[:2]
+        self.transform = {'scale': [scale, scale], 'translate': translate.tolist()}
+
+        # Every ring of every polygon as packed quantized points, exterior rings first
+        parts, part_owners = shapely.get_parts(geometries, return_index=True)
+        rings, ring_parts = shapely.get_rings(parts, return_index=True)
+        coordinates, point_rings = shapely.get_coordinates(rings, return_index=True)
+        quantized = np.round((coordinates - translate) / scale).astype(np.int64)
+
+        # Each quantized point is packed into one integer, x * height + y, which must fit in 64 bits
+        self._height = int(quantized[:, 1].max()) + 1 if len(quantized) else 1
+        if len(quantized) and (int(quantized[:, 0].max()) + 1) * self._height > np.iinfo(np.int64).max:
+            raise ValueError(f'The layer is too large to build a topology at {precision} decimal places.')
+        points = quantized[:, 0] * self._height + quantized[:, 1]
+
+        # Drop the closing point of each ring and points quantized onto the one before them
+        same_ring = point_rings[1:] == point_rings[:-1]
+        closing = np.append(~same_ring, True)
+        repeated = np.insert(same_ring & (points[1:] == points[:-1]), 0, False)
+        keep = ~closing & ~repeated
+        points, point_rings = points[keep], point_rings[keep]
+        starts = np.searchsorted(point_rings, np.arange(len(rings)))
+        sizes = np.diff(np.append(starts, len(points)))
+
+        # A point is a junction where rings through it do not all share the same two
+        # neighbors: where a border between two polygons starts, ends or branches
+        offset = np.arange(len(points)) - starts[point_rings]
+        before = points[starts[point_rings] + (offset - 1) % sizes[point_rings]]
+        after = points[starts[point_rings] + (offset + 1) % sizes[point_rings]]
+        pairs = pd.DataFrame({'point': points, 'low': np.minimum(before, after), 'high': np.maximum(before, after)})
+        counts = pairs.drop_duplicates()['point'].value_counts()
+        junctions = np.isin(points, counts.index[counts.to_numpy() > 1].to_numpy())
+
+        self._arcs = {}
+        self.arcs = []
+        ring_arcs = [
+            self._cut(points[start:start + size], junctions[start:start + size]) if size >= 3 else None
+            for start, size in zip(starts, sizes)
+        ]
+
+        # Polygons as lists of rings, each ring as the arcs it is made of; polygons whose
+        # exterior collapsed at this precision are left out
+        exteriors = np.searchsorted(ring_parts, np.arange(len(parts)))
+        polygons = [[] for _ in range(len(parts))]
+        for ring, part in enumerate(ring_parts):
+            if ring_arcs[ring] is not None and (polygons[part] or ring == exteriors[part]):
+                polygons[part].append(ring_arcs[ring])
+        shapes = [[] for _ in range(len(geometries))]
+        for part, owner in enumerate(part_owners):
+            if polygons[part]:
+                shapes[owner].append(polygons[part])
+        self.geometries = [
+            {'type': 'Polygon', 'arcs': shape[0]} if len(shape) == 1
+            else {'type': 'MultiPolygon', 'arcs': shape} if shape
+            else {'type': None}
+            for shape in shapes
+        ]
+        self.points = int(sum(len(arc) for arc in self.arcs))
+        del self._arcs
+
+    # Arcs of one ring, cut at its junctions. A ring without junctions is one closed arc.
+    # Rings are short, so they are cut as lists rather than arrays.
+    def _cut(self, ring, junctions):
+        ring = ring.tolist()
+        cuts = np.flatnonzero(junctions).tolist()
+        if not cuts:
+            start = ring.index(min(ring))
+            return [self._arc(ring[start:] + ring[:start + 1])]
+        first = cuts[0]
+        ring = ring[first:] + ring[:first + 1]
+        cuts = [cut - first for cut in cuts] + [len(ring) - 1]
+        return [self._arc(ring[start:end + 1]) for start, end in zip(cuts[:-1], cuts[1:])]
+
+    # Index of an arc, adding it the first time it is seen. An arc already stored in the
+    # other direction is referenced by its complement, as TopoJSON does.
+    def _arc(self, points):
+        key = tuple(points)
+        if key in self._arcs:
+            return self._arcs[key]
+        if key[::-1] in self._arcs:
+            return ~self._arcs[key[::-1]]
+        index = self._arcs[key] = len(self.arcs)
+        arc, last_x, last_y = [], 0, 0
+        for point in points:
+            x, y = divmod(point, self._height)
+            arc.append([x - last_x, y - last_y])
+            last_x, last_y = x, y
+        self.arcs.append(arc)
+        return index
+
+    # TopoJSON of the given rows of the layer, each carrying its properties
+    def encode(self, rows, properties):
+        geometries = [
+            {**self.geometries[row], 'properties': values} if row >= 0 else {'type': None, 'properties': values}
+            for row, values in zip(rows, properties)
+        ]
+        return {
+            'type': 'Topology',
+            'transform': self.transform,
+            'objects': {OBJECT: {'type': 'GeometryCollection', 'geometries': geometries}},
+            'arcs': self.arcs,
+        }
+
+    # Arcs are held as Python lists of small integers: about 100 bytes a point
+    def memory_usage(self):
+        return int(self.points * 100 + (self.keys.nbytes if self.keys is not None else 0))
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Load the topology of one simplification level of a boundary layer once per process
+def load_topology(name, level, precision=PRECISION):
+    def build():
+        layer = simplify.load_level(name, level)
+        keys = layer[codes.KEY].to_numpy(dtype='int64', na_value=-1) if codes.KEY in layer else None
+        return Topology(layer.geometry.values.to_numpy(), keys, precision)
+
+    return reference.load_derived(name, f'topology-{level}-{precision}', build)
+
+# TopoJSON of a combined layer carrying only the given properties and the class of each
+# feature; the TopoJSON counterpart of choropleth.class_geojson
+def class_topology(combined, name, level, classification, properties, precision=PRECISION):
+    # Row of the layer holding each code; a code held by several rows is drawn from the first
+    topology = load_topology(name, level, precision)
+    keys, first = np.unique(topology.keys, return_index=True)
+    found = pd.Index(keys).get_indexer(combined[codes.KEY])
+    rows = np.where(found >= 0, first[found], -1)
+
+    values = combined[properties].copy()
+    values[choropleth.CLASS_PROPERTY] = classification.classes
+    return topology.encode(rows, values.to_dict('records'))
+
+# TopoJSON of every feature of a layer, without properties, such as the Michigan border
+def layer_topology(name, level='full', precision=PRECISION):
+    topology = load_topology(name, level, precision)
+    return topology.encode(range(len(topology.geometries)), [{}] * len(topology.geometries))
+
+#------------------------------------------------------------------------
+# Map element
+#------------------------------------------------------------------------
+
+# Polygon layer drawn from TopoJSON, decoded to GeoJSON in the browser. The payload is
+# embedded as compact JSON and styled by a choropleth.ClassStyles child, so no style
+# property is added to each geometry as folium.TopoJson does.
+class TopoJsonLayer(folium.TopoJson):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }}_data = {{ this.payload }};
+            var {{ this.get_name() }} = L.geoJson(
+                topojson.feature({{ this.get_name() }}_data, {{ this.get_name() }}_data.objects[{{ this.object_name|tojson }}])
+            ).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, data, name=None, control=True, tooltip=None):
+        super().__init__(data, f'objects.{OBJECT}', name=name, control=control, tooltip=tooltip)
+        self._name = 'TopoJsonLayer'
+        self.object_name = OBJECT
+
+    def style_data(self):
+        pass
+
+    def render(self, **kwargs):
+        self.payload = htmlsafe_json_dumps(self.data, separators=(',', ':'))
+        super().render(**kwargs)
@@ -0,0 +1,185 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from mtss_maps import perf, pipeline, reference, rollup, spatial
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Memory ceiling of the processed upload cache, in megabytes
+MAX_MEGABYTES = int(os.environ.get('MTSS_UPLOAD_CACHE_MB', 256))
+
+#------------------------------------------------------------------------
+# Upload cache
+#------------------------------------------------------------------------
+
+# Approximate memory held by a cached result, in bytes. A folium map holds about as much
+# as the HTML rendered from it, which is cached next to it as 'view', so it is counted as that again.
+def _size(value):
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, pd.DataFrame):
+        return reference.memory_usage(value)
+    if isinstance(value, dict):
+        size = sum(_size(item) for item in value.values())
+        if 'map' in value and isinstance(value.get('view'), str):
+            size += len(value['view'])
+        return size
+    return 0
+
+# Readable form of a cache key for the performance log, without the upload hashes
+def _describe(key):
+    parts = key if isinstance(key, tuple) else (key,)
+    words = []
+    for part in parts:
+        if isinstance(part, tuple):
+            words.append(_describe(part))
+        elif not (isinstance(part, str) and len(part) == 64):
+            words.append(str(part))
+    return ' '.join(word for word in words if word)
+
+# Least-recently-used cache of processed uploads, shared by every session of the process
+class UploadCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # One lock per key being built, so sessions uploading the same file at once build it only once
+        self._building = {}
+
+    # Cached result for a key, counted as a hit, or None
+    def _lookup(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    # Cached result for a key, building and storing it on a miss. Callers asking for a key
+    # being built wait for it; different keys build in parallel.
+    # Builds that raise are not cached. Returned results are shared: do not modify them.
+    def get_or_build(self, key, build):
+        with perf.span('cache', key=_describe(key)) as record:
+            value = self._lookup(key)
+            if value is None:
+                with self._lock:
+                    building = self._building.setdefault(key, threading.Lock())
+                with building:
+                    value = self._lookup(key)
+                    if value is None:
+                        with self._lock:
+                            self.misses += 1
+                        record['hit'] = False
+                        try:
+                            value = build()
+                            size = _size(value)
+                            record['bytes'] = size
+                            self._store(key, value, size)
+                        finally:
+                            with self._lock:
+                                self._building.pop(key, None)
+                        return value
+            record['hit'] = True
+            return value
+
+    def _store(self, key, value, size):
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = value
+                self._sizes[key] = size
+                self._bytes += size
+                self._evict()
+
+    # Drop least recently used entries until the cache fits its ceiling
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            key, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(key)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+cache = UploadCache(MAX_MEGABYTES * 1024 * 1024)
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Cache key of an upload: a hash of its bytes and the entity type it is mapped as
+def upload_key(data, entity):
+    return (hashlib.sha256(data).hexdigest(), entity)
+
+# Read, normalize and join an upload once per distinct file and entity type.
+# Returns the upload, the combined layer, the included and unmatched tables and
+# the unmatched rows whose code is not a valid code.
+def load_upload(data, filename, entity):
+    def build():
+        df = pipeline.read_upload(io.BytesIO(data), entity, filename)
+        combined, included, unmatched = pipeline.combine(entity, df)
+        return {'df': df, 'combined': combined, 'included': included, 'unmatched': unmatched, 'invalid': pipeline.invalid_codes(entity, df)}
+
+    return cache.get_or_build(upload_key(data, entity), build)
+
+# Count the Schools of a School upload in each District or ISD and join the counts to the
+# level's layer, once per distinct file and level. Returns the same tables as load_upload.
+def load_rollup(data, filename, level):
+    def build():
+        df = rollup.roll_up(load_upload(data, filename, 'school')['df'], level)
+        combined, included, unmatched = pipeline.combine(level, df)
+        return {'df': df, 'combined': combined, 'included': included, 'unmatched': unmatched}
+
+    return cache.get_or_build((*upload_key(data, 'school'), 'rollup', level), build)
+
+# Read an upload of latitude/longitude points, count the points in each boundary of the
+# entity and join the counts to its layer, once per distinct file and entity type.
+# Returns the same tables as load_upload, plus the number of points and of points outside every boundary.
+def load_point_upload(data, filename, entity):
+    def build():
+        longitude, latitude = spatial.read_coordinates(io.BytesIO(data), filename)
+        df, outside = spatial.aggregate(entity, longitude, latitude)
+        combined, included, unmatched = pipeline.combine(entity, df)
+        return {'df': df, 'combined': combined, 'included': included, 'unmatched': unmatched, 'points': len(longitude), 'outside': outside}
+
+    return cache.get_or_build((*upload_key(data, entity), 'points'), build)
+
+# Tables of the entities held by an uploaded workbook, read once per distinct file
+def load_workbook(data, filename):
+    return cache.get_or_build(upload_key(data, 'workbook'), lambda: pipeline.read_workbook(io.BytesIO(data), filename))
+
+# Match lists and serialized map layer of one entity of a workbook. Built the first
+# time the layer is enabled, so a combined map only pays for the layers it shows.
+def load_workbook_layer(data, filename, entity):
+    def build():
+        return pipeline.workbook_layer(entity, load_workbook(data, filename)[entity])
+
+    return cache.get_or_build((upload_key(data, 'workbook'), 'layer', entity), build)
@@ -0,0 +1,168 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import atexit
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from mtss_maps import perf, registry
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Set MTSS_WARMUP=0 to load the mapping modules and reference data on first use instead
+ENABLED = os.environ.get('MTSS_WARMUP', '1') != '0'
+
+# Modules behind the maps, which the pages only import once a file is uploaded
+MODULES = ('mtss_maps.pipeline', 'mtss_maps.uploads')
+
+# Modules only needed by the map click events, imported last
+EVENT_MODULES = ('streamlit_folium',)
+
+# Progress of the warm-up of this process, shared by every session
+_status = {'state': 'idle' if ENABLED else 'off', 'done': 0, 'steps': 0, 'seconds': None, 'failed': []}
+_lock = threading.Lock()
+_thread = None
+
+# Pages building a map right now, which the warm-up waits for between its steps,
+# and the longest it waits, so a busy app still finishes warming up
+_pauses = 0
+_resumed = threading.Condition()
+PAUSE_LIMIT = 30
+
+# Set when the process exits: the warm-up finishes the step it is in and stops, rather than
+# being killed inside the libraries it is loading with
+_stopping = threading.Event()
+
+#------------------------------------------------------------------------
+# Steps
+#------------------------------------------------------------------------
+
+# Import modules, so the first upload does not wait for them
+def _import_modules(modules=MODULES):
+    for name in modules:
+        importlib.import_module(name)
+
+# Reference layers, simplified boundaries, projected figure shapes and the HTML download template of an entity
+def _load_layers(entity):
+    from mtss_maps import pipeline, templates
+    pipeline.warm(entity, target='live')
+    pipeline.warm(entity, target='html', figures=True)
+    if registry.MAP_MAKERS[entity]['kind'] == 'boundary':
+        templates.load_template(entity)
+
+# Name and trigram indexes of an entity's Code Matchmaker, and the polygon index points are located with
+def _load_indexes(entity):
+    from mtss_maps import fuzzy, matching, spatial
+    matching.load_name_index(entity)
+    fuzzy.load_trigram_index(entity)
+    if registry.MAP_MAKERS[entity]['kind'] == 'boundary':
+        spatial.load_index(registry.MAP_MAKERS[entity]['layer'])
+
+# Indexes shared by every page: the School -> District -> ISD index and the code search index
+def _load_shared():
+    from mtss_maps import rollup, search
+    rollup.load_index()
+    search.load_search_index()
+
+# Everything the pages load on first use, the given entity first
+def _steps(first=None):
+    entities = sorted(registry.MAP_MAKERS, key=lambda entity: entity != first)
+    steps = [('modules', _import_modules)]
+    for entity in entities:
+        steps.append((f'{entity} layers', lambda entity=entity: _load_layers(entity)))
+        steps.append((f'{entity} indexes', lambda entity=entity: _load_indexes(entity)))
+    steps.append(('search and School indexes', _load_shared))
+    steps.append(('map event modules', lambda: _import_modules(EVENT_MODULES)))
+    return steps
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Run the warm-up steps in order. A step that fails is logged with its error and skipped;
+# whatever it would have loaded is loaded on first use instead.
+def _run(steps):
+    start = time.perf_counter()
+    with perf.span('warmup', steps=len(steps)) as record:
+        for name, step in steps:
+            with _resumed:
+                _resumed.wait_for(lambda: _pauses == 0 or _stopping.is_set(), PAUSE_LIMIT)
+            if _stopping.is_set():
+                break
+            try:
+                with perf.span('warmup_step', step=name):
+                    step()
+            except Exception:
+                _status['failed'].append(name)
+            _status['done'] += 1
+        record['failed'] = len(_status['failed'])
+    _status['seconds'] = time.perf_counter() - start
+    _status['state'] = 'ready'
+
+# Start loading the mapping modules and reference data in a background thread, once per
+# process; later calls do nothing. The entity of the page that started it is loaded first.
+# The end of the warm-up is logged as a "warmup" span.
+def start(first=None):
+    global _thread
+    if not ENABLED:
+        return
+    with _lock:
+        if _thread is not None:
+            return
+        steps = _steps(first)
+        _status.update(state='running', steps=len(steps))
+        _thread = threading.Thread(target=_run, args=(steps,), name='mtss-warmup', daemon=True)
+        _thread.start()
+        atexit.register(_stop)
+
+# Stop the warm-up after its current step, at exit
+def _stop():
+    _stopping.set()
+    with _resumed:
+        _resumed.notify_all()
+    _thread.join()
+
+# Hold the warm-up between its steps while a page builds a map, so the two do not compete
+# for the interpreter. Whatever the page needs that the warm-up is loading, it waits for.
+@contextmanager
+def paused():
+    global _pauses
+    with _resumed:
+        _pauses += 1
+    try:
+        yield
+    finally:
+        with _resumed:
+            _pauses -= 1
+            _resumed.notify_all()
+
+# Progress of the warm-up: its state ('off', 'idle', 'running' or 'ready'), the number of
+# steps done, the total time once ready and the steps that failed
+def status():
+    return {**_status, 'failed': list(_status['failed'])}
+
+# Wait for the warm-up to finish; returns whether it did within the timeout
+def wait(timeout=None):
+    if _thread is not None:
+        _thread.join(timeout)
+    return _status['state'] == 'ready'
+
+# Start the app with the warm-up running from boot, before the first visitor:
+#   python -m mtss_maps.warmup District_Map_Maker.py [streamlit run options]
+def main():
+    # Started through the package module, the one the pages import, so they see its progress
+    from mtss_maps import warmup
+    warmup.start()
+    from streamlit.web import cli
+    sys.argv = ['streamlit', 'run', *sys.argv[1:]]
+    sys.exit(cli.main())
+
+if __name__ == '__main__':
+    main()
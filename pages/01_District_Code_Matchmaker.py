@@ -5,6 +5,7 @@
 import pandas as pd
 import streamlit as st
 from PIL import Image
+from mtss_maps import codes, display, fuzzy, matching, perf, search, warmup
 
 #------------------------------------------------------------------------
 # Configurations
@@ -41,7 +42,7 @@ st.divider()
 
 # Add the descriptive text
 st.markdown("""
-District names must be exact matches and are case-sensitive. If needed, use the 'Enter search string' option to enter partial names to locate a match.
+District names must be exact matches and are case-sensitive. If needed, use the 'Enter search string' option to enter partial names to locate a match. Close matches are suggested for any unmatched rows.
 """)
 
 st.divider()
@@ -50,32 +51,25 @@ contact = st.sidebar.toggle('Handmade by  \n**LeVesseur** :grey[ PhD]  \n| :grey
 if contact:
     st.sidebar.write('Inquiries: [info@mtss.ai](mailto:info@mtss.ai)  \nProfile: [levesseur.com](http://levesseur.com)  \nCheck out: [InkQA | Dynamic PDFs](http://www.inkqa.com)')  
 
+# Time the stages of this run for the performance panel and the JSON log
+spans = display.start_spans('district_matchmaker')
+
+# Load the code indexes and reference data in the background, this page's entity first
+warmup.start('district')
+
 
 #------------------------------------------------------------------------
 # Functions
 #------------------------------------------------------------------------
 
-# Load the MI_District_Codes file
-@st.cache_data
-def load_district_codes_file():
-    return pd.read_csv("codes/MI_District_Codes.csv")
-
 # Define the main function
 def main():
-    # Load the MI_District_Codes file
-    df = load_district_codes_file()
-
-    # Remove trailing spaces from the 'District' column
-    df['District'] = df['District'].str.strip()
-
     # Search functionality on the main page
     st.header("Search Districts")
     search_string = st.text_input("Enter search string")
     if search_string:
-        matching_rows = df[df['District'].str.startswith(search_string)]
-        # Convert 'District Code' values to strings without commas
-        matching_rows['District Code'] = matching_rows['District Code'].astype(str)
-        matching_rows_display = matching_rows[['District', 'District Code']]
+        # Look the string up by name, word or code across every code table, Districts first
+        matching_rows_display = search.load_search_index().search(search_string, prefer='District')
         st.subheader("Matching Rows:")
         st.dataframe(matching_rows_display)
 
@@ -84,27 +78,29 @@ def main():
     uploaded_file = st.file_uploader("Upload your file", type=['xlsx', 'csv'])
 
     if uploaded_file is not None:
-        if uploaded_file.name.endswith('.csv'):
-            df_nc = pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith('.xlsx'):
-            df_nc = pd.read_excel(uploaded_file)
-        else:
-            st.error("Unsupported file format. Please upload a CSV or XLSX file.")
-            return  # Stop execution if file format is not supported
-
-        # Remove trailing spaces from the 'District' column
-        df_nc['District'] = df_nc['District'].str.strip()
-
-        # Map district codes
-        def map_district_codes(row):
-            matching_row = df[df['District'] == row['District']]
-            if not matching_row.empty:
-                return matching_row.iloc[0]['District Code']
+        with perf.span('read', bytes=uploaded_file.size) as record:
+            if uploaded_file.name.endswith('.csv'):
+                df_nc = pd.read_csv(uploaded_file)
+            elif uploaded_file.name.endswith('.xlsx'):
+                df_nc = pd.read_excel(uploaded_file)
             else:
-                return None
+                st.error("Unsupported file format. Please upload a CSV or XLSX file.")
+                return  # Stop execution if file format is not supported
+            record['rows'] = len(df_nc)
+
+        with perf.span('match', entity='district', rows=len(df_nc)):
+            # Remove trailing spaces from the 'District' column
+            df_nc['District'] = df_nc['District'].str.strip()
 
-        # Add 'District Code' column
-        df_nc['District Code'] = df_nc.apply(map_district_codes, axis=1)
+            # Map district codes through the prebuilt name index (the first listed code wins)
+            district_index = matching.load_name_index('district')
+            df_nc['District Code'] = district_index.lookup(df_nc['District'])
+
+            # Report uploaded names that are listed with more than one code
+            ambiguous_names = district_index.ambiguous_in(df_nc['District'])
+        if not ambiguous_names.empty:
+            st.warning("Some District names are listed with more than one code. The first listed code was used:")
+            st.dataframe(ambiguous_names)
 
         # Display matched rows
         matched_rows = df_nc[~df_nc['District Code'].isnull()]
@@ -120,6 +116,13 @@ def main():
         st.dataframe(unmatched_rows)
         st.write("Total number of unmatched rows:", len(unmatched_rows))
 
+        # Suggest the closest District names for the unmatched rows
+        if not unmatched_rows.empty:
+            suggestions = fuzzy.suggest_matches('district', unmatched_rows['District'])
+            if not suggestions.empty:
+                st.text("Suggested Matches:")
+                st.dataframe(suggestions)
+
         st.success('Processing complete!')
 
         st.divider()
@@ -127,15 +130,17 @@ def main():
         import io
 
         # Ensure 'District Code' is treated as a string and remove any decimal points
-        df_nc['District Code'] = df_nc['District Code'].apply(lambda x: str(int(float(x))) if pd.notnull(x) else '')
+        df_nc['District Code'] = codes.format_codes(codes.code_keys(df_nc['District Code'])[0], width=0).fillna('')
 
         # Convert DataFrame to Excel format without the index
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df_nc.to_excel(writer, index=False)
+        with perf.span('export', format='xlsx', rows=len(df_nc)) as record:
+            output = io.BytesIO()
+            with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                df_nc.to_excel(writer, index=False)
 
-        # Get the Excel data from the BytesIO object
-        excel_data = output.getvalue()
+            # Get the Excel data from the BytesIO object
+            excel_data = output.getvalue()
+            record['bytes'] = len(excel_data)
 
         # Download updated file as Excel
         st.subheader("Download Updated File")
@@ -148,3 +153,4 @@ def main():
 
 if __name__ == "__main__":
     main()
+    display.perf_panel(spans)
@@ -5,6 +5,7 @@
 import pandas as pd
 import streamlit as st
 from PIL import Image
+from mtss_maps import display, fuzzy, matching, perf, search, warmup
 
 #------------------------------------------------------------------------
 # Configurations
@@ -41,7 +42,7 @@ st.divider()
 
 # Add the descriptive text
 st.markdown("""
-PSA names must be exact matches and are case-sensitive. If needed, use the 'Enter search string' option to enter partial names to locate a match.
+PSA names must be exact matches and are case-sensitive. If needed, use the 'Enter search string' option to enter partial names to locate a match. Close matches are suggested for any unmatched rows.
 """)
 
 st.divider()
@@ -50,31 +51,24 @@ contact = st.sidebar.toggle('Handmade by  \n**LeVesseur** :grey[ PhD]  \n| :grey
 if contact:
     st.sidebar.write('Inquiries: [info@mtss.ai](mailto:info@mtss.ai)  \nProfile: [levesseur.com](http://levesseur.com)  \nCheck out: [InkQA | Dynamic PDFs](http://www.inkqa.com)')  
 
+# Time the stages of this run for the performance panel and the JSON log
+spans = display.start_spans('psa_matchmaker')
+
+# Load the code indexes and reference data in the background, this page's entity first
+warmup.start('psa')
+
 #------------------------------------------------------------------------
 # Functions
 #------------------------------------------------------------------------
 
-# Load the MI_PSA_Codes file
-@st.cache_data
-def load_PSA_codes_file():
-    return pd.read_csv("codes/MI_PSA_Codes.csv")
-
 # Define the main function
 def main():
-    # Load the MI_PSA_Codes file
-    df = load_PSA_codes_file()
-
-    # Remove trailing spaces from the 'PSA' column
-    df['PSA'] = df['PSA'].str.strip()
-
     # Search functionality on the main page
     st.header("Search PSAs")
     search_string = st.text_input("Enter search string")
     if search_string:
-        matching_rows = df[df['PSA'].str.startswith(search_string)]
-        # Convert 'PSA Code' values to strings without commas
-        matching_rows['PSA Code'] = matching_rows['PSA Code'].astype(str)
-        matching_rows_display = matching_rows[['PSA', 'PSA Code']]
+        # Look the string up by name, word or code across every code table, PSAs first
+        matching_rows_display = search.load_search_index().search(search_string, prefer='PSA')
         st.subheader("Matching Rows:")
         st.dataframe(matching_rows_display)
 
@@ -83,27 +77,29 @@ def main():
     uploaded_file = st.file_uploader("Upload your file", type=['xlsx', 'csv'])
 
     if uploaded_file is not None:
-        if uploaded_file.name.endswith('.csv'):
-            df_nc = pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith('.xlsx'):
-            df_nc = pd.read_excel(uploaded_file)
-        else:
-            st.error("Unsupported file format. Please upload a CSV or XLSX file.")
-            return  # Stop execution if file format is not supported
-
-        # Remove trailing spaces from the 'PSA' column
-        df_nc['PSA'] = df_nc['PSA'].str.strip()
-
-        # Map PSA codes
-        def map_PSA_codes(row):
-            matching_row = df[df['PSA'] == row['PSA']]
-            if not matching_row.empty:
-                return matching_row.iloc[0]['PSA Code']
+        with perf.span('read', bytes=uploaded_file.size) as record:
+            if uploaded_file.name.endswith('.csv'):
+                df_nc = pd.read_csv(uploaded_file)
+            elif uploaded_file.name.endswith('.xlsx'):
+                df_nc = pd.read_excel(uploaded_file)
             else:
-                return None
+                st.error("Unsupported file format. Please upload a CSV or XLSX file.")
+                return  # Stop execution if file format is not supported
+            record['rows'] = len(df_nc)
+
+        with perf.span('match', entity='psa', rows=len(df_nc)):
+            # Remove trailing spaces from the 'PSA' column
+            df_nc['PSA'] = df_nc['PSA'].str.strip()
 
-        # Add 'PSA Code' column
-        df_nc['PSA Code'] = df_nc.apply(map_PSA_codes, axis=1)
+            # Map PSA codes through the prebuilt name index (the first listed code wins)
+            psa_index = matching.load_name_index('psa')
+            df_nc['PSA Code'] = psa_index.lookup(df_nc['PSA'])
+
+            # Report uploaded names that are listed with more than one code
+            ambiguous_names = psa_index.ambiguous_in(df_nc['PSA'])
+        if not ambiguous_names.empty:
+            st.warning("Some PSA names are listed with more than one code. The first listed code was used:")
+            st.dataframe(ambiguous_names)
 
         # Display matched rows
         matched_rows = df_nc[~df_nc['PSA Code'].isnull()]
@@ -119,6 +115,13 @@ def main():
         st.dataframe(unmatched_rows)
         st.write("Total number of unmatched rows:", len(unmatched_rows))
 
+        # Suggest the closest PSA names for the unmatched rows
+        if not unmatched_rows.empty:
+            suggestions = fuzzy.suggest_matches('psa', unmatched_rows['PSA'])
+            if not suggestions.empty:
+                st.text("Suggested Matches:")
+                st.dataframe(suggestions)
+
         st.success('Processing complete!')
 
         st.divider()
@@ -126,12 +129,16 @@ def main():
         # Download updated file
         st.subheader("Download Updated File")
         df_nc_selected_columns = df_nc[['PSA', 'PSA Code']]  # Select only the desired columns
+        with perf.span('export', format='csv', rows=len(df_nc)) as record:
+            csv = df_nc_selected_columns.to_csv(index=False)
+            record['bytes'] = len(csv)
         st.download_button(
             label="Download",
-            data=df_nc_selected_columns.to_csv(index=False),
+            data=csv,
             file_name='PSA_updated_file.csv',
             mime='text/csv'
         )
 
 if __name__ == "__main__":
     main()
+    display.perf_panel(spans)
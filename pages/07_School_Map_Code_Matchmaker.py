@@ -5,6 +5,7 @@
 import pandas as pd
 import streamlit as st
 from PIL import Image
+from mtss_maps import display, fuzzy, matching, perf, search, warmup
 
 #------------------------------------------------------------------------
 # Configurations
@@ -33,7 +34,7 @@ st.divider()
 
 # Add the descriptive text
 st.markdown("""
-School names must be exact matches and are case-sensitive. If needed, use the 'Enter search string' option to enter partial names to locate a match.
+School names must be exact matches and are case-sensitive. If needed, use the 'Enter search string' option to enter partial names to locate a match. Close matches are suggested for any unmatched rows.
 """)
 
 st.divider()
@@ -42,31 +43,24 @@ contact = st.sidebar.toggle('Handmade by  \n**LeVesseur** :grey[ PhD]  \n| :grey
 if contact:
     st.sidebar.write('Inquiries: [info@mtss.ai](mailto:info@mtss.ai)  \nProfile: [levesseur.com](http://levesseur.com)  \nCheck out: [InkQA | Dynamic PDFs](http://www.inkqa.com)')  
 
+# Time the stages of this run for the performance panel and the JSON log
+spans = display.start_spans('school_matchmaker')
+
+# Load the code indexes and reference data in the background, this page's entity first
+warmup.start('school')
+
 #------------------------------------------------------------------------
 # Functions
 #------------------------------------------------------------------------
 
-# Load the MI_School_Codes file
-@st.cache_data
-def load_school_codes_file():
-    return pd.read_csv("codes/MI_School_Codes.csv")
-
 # Define the main function
 def main():
-    # Load the MI_School_Codes file
-    df = load_school_codes_file()
-
-    # Remove trailing spaces from the 'School' column
-    df['School'] = df['School'].str.strip()
-
     # Search functionality on the main page
     st.header("Search Schools")
     search_string = st.text_input("Enter search string")
     if search_string:
-        matching_rows = df[df['School'].str.startswith(search_string)]
-        # Convert 'School Code' values to strings without commas
-        matching_rows['School Code'] = matching_rows['School Code'].astype(str)
-        matching_rows_display = matching_rows[['School', 'School Code']]
+        # Look the string up by name, word or code across every code table, Schools first
+        matching_rows_display = search.load_search_index().search(search_string, prefer='School')
         st.subheader("Matching Rows:")
         st.dataframe(matching_rows_display)
 
@@ -75,27 +69,29 @@ def main():
     uploaded_file = st.file_uploader("Upload your file", type=['xlsx', 'csv'])
 
     if uploaded_file is not None:
-        if uploaded_file.name.endswith('.csv'):
-            df_nc = pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith('.xlsx'):
-            df_nc = pd.read_excel(uploaded_file)
-        else:
-            st.error("Unsupported file format. Please upload a CSV or XLSX file.")
-            return  # Stop execution if file format is not supported
-
-        # Remove trailing spaces from the 'School' column
-        df_nc['School'] = df_nc['School'].str.strip()
-
-        # Map School codes
-        def map_school_codes(row):
-            matching_row = df[df['School'] == row['School']]
-            if not matching_row.empty:
-                return matching_row.iloc[0]['School Code']
+        with perf.span('read', bytes=uploaded_file.size) as record:
+            if uploaded_file.name.endswith('.csv'):
+                df_nc = pd.read_csv(uploaded_file)
+            elif uploaded_file.name.endswith('.xlsx'):
+                df_nc = pd.read_excel(uploaded_file)
             else:
-                return None
+                st.error("Unsupported file format. Please upload a CSV or XLSX file.")
+                return  # Stop execution if file format is not supported
+            record['rows'] = len(df_nc)
+
+        with perf.span('match', entity='school', rows=len(df_nc)):
+            # Remove trailing spaces from the 'School' column
+            df_nc['School'] = df_nc['School'].str.strip()
 
-        # Add 'School Code' column
-        df_nc['School Code'] = df_nc.apply(map_school_codes, axis=1)
+            # Map School codes through the prebuilt name index (the first listed code wins)
+            school_index = matching.load_name_index('school')
+            df_nc['School Code'] = school_index.lookup(df_nc['School'])
+
+            # Report uploaded names that are listed with more than one code
+            ambiguous_names = school_index.ambiguous_in(df_nc['School'])
+        if not ambiguous_names.empty:
+            st.warning("Some School names are listed with more than one code. The first listed code was used:")
+            st.dataframe(ambiguous_names)
 
         # Display matched rows
         matched_rows = df_nc[~df_nc['School Code'].isnull()]
@@ -111,6 +107,13 @@ def main():
         st.dataframe(unmatched_rows)
         st.write("Total number of unmatched rows:", len(unmatched_rows))
 
+        # Suggest the closest School names for the unmatched rows
+        if not unmatched_rows.empty:
+            suggestions = fuzzy.suggest_matches('school', unmatched_rows['School'])
+            if not suggestions.empty:
+                st.text("Suggested Matches:")
+                st.dataframe(suggestions)
+
         st.success('Processing complete!')
 
         st.divider()
@@ -118,12 +121,16 @@ def main():
         # Download updated file
         st.subheader("Download Updated File")
         df_nc_selected_columns = df_nc[['School', 'School Code']]  # Select only the desired columns
+        with perf.span('export', format='csv', rows=len(df_nc)) as record:
+            csv = df_nc_selected_columns.to_csv(index=False)
+            record['bytes'] = len(csv)
         st.download_button(
             label="Download",
-            data=df_nc_selected_columns.to_csv(index=False),
+            data=csv,
             file_name='School_updated_file.csv',
             mime='text/csv'
         )
 
 if __name__ == "__main__":
     main()
+    display.perf_panel(spans)
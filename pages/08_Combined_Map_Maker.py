@@ -0,0 +1,157 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import streamlit as st
+from PIL import Image
+from mtss_maps import display, mapmaker, registry, warmup
+
+#------------------------------------------------------------------------
+# Configurations
+#------------------------------------------------------------------------
+
+# Streamlit page setup
+Icon = Image.open("images/MTSS.ai_Icon.png")
+st.set_page_config(
+    page_title="MTSS Map Maker | ISD District PSA",
+    page_icon=Icon,
+    layout="centered",
+    initial_sidebar_state="auto",
+    menu_items={
+        'About': "### *This application was created by*  \n### LeVesseur Ph.D | MTSS.ai"
+    }
+)
+
+#------------------------------------------------------------------------
+# Header
+#------------------------------------------------------------------------
+
+mapmaker.page_header('Combined')
+
+# Time the stages of this run for the performance panel and the JSON log
+spans = display.start_spans('combined')
+
+# Load the mapping modules and reference data in the background while the visitor picks a file
+warmup.start()
+
+# Map events are opt-in: without them the map is shown as static HTML, so panning or zooming never reruns the page
+map_events = st.sidebar.toggle('Map click events')
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+st.divider()
+
+# Add the descriptive text
+st.markdown("""
+Map ISDs, Districts, PSAs and Schools from one workbook on one map. Each sheet of the workbook holds one entity type with its name and code columns: 'ISD' and 'ISD Code', 'District' and 'District Code', 'PSA' and 'PSA Code', or 'School' and 'School Code'.
+
+Every entity type found gets its own layer. Turn layers on below; each layer is loaded the first time it is turned on.
+""")
+
+mapmaker.example_download('examples/Combined_Data.xlsx', "Download an example combined data workbook")
+
+st.divider()
+
+# Excel/CSV file upload
+uploaded_file = st.file_uploader("Upload your data workbook XLSX | CSV", type=['xlsx', 'csv'])
+if uploaded_file is not None:
+    from mtss_maps import pipeline, reference, uploads
+
+    # Check the file type before reading it
+    if not uploaded_file.name.endswith(('.csv', '.xlsx')):
+        st.error("Unsupported file format. Please upload a CSV or XLSX file.")
+        display.stop(spans)  # Stop execution if file format is not supported
+
+    # Read every sheet once per distinct file and find the entity types it holds
+    upload_data = uploaded_file.getvalue()
+    try:
+        workbook = uploads.load_workbook(upload_data, uploaded_file.name)
+    except ValueError as error:
+        st.warning(str(error))
+        display.stop(spans)  # Stop execution if no sheet has a name and code column pair
+
+    # One toggle per entity type found; only the first one starts on
+    entities = [entity for entity in workbook if reference.layer_available(registry.MAP_MAKERS[entity]['layer'])]
+    if not entities:
+        st.warning("None of the entity types in your workbook has a reference layer available.")
+        display.stop(spans)
+    st.write("Layers:")
+    enabled = [
+        entity for i, entity in enumerate(entities)
+        if st.toggle(f"{registry.MAP_MAKERS[entity]['name_column']}s", value=i == 0, key=f'layer-{entity}')
+    ]
+    if not enabled:
+        st.info("Turn on at least one layer to draw the map.")
+        display.stop(spans)
+
+    with st.spinner("Processing data and generating map"):
+        # Each layer is joined and serialized the first time it is turned on; reruns and
+        # other combinations of layers reuse it
+        layers = {entity: uploads.load_workbook_layer(upload_data, uploaded_file.name, entity) for entity in enabled}
+
+        # Build the map of each combination of layers once; reruns reuse it
+        def build_maps():
+            m = pipeline.create_combined_map(layers)
+            html = display.view_html(m)
+            return {'map': m, 'view': html, 'html': html.encode('utf-8')}
+
+        maps = uploads.cache.get_or_build((uploads.upload_key(upload_data, 'workbook'), 'maps', tuple(enabled)), build_maps)
+
+    # Included and unmatched lists of each layer, rerun on their own when a list is downloaded
+    @display.fragment
+    def show_lists(layers):
+        for entity, layer in layers.items():
+            label = registry.MAP_MAKERS[entity]['name_column']
+            columns = [label, registry.MAP_MAKERS[entity]['code_column']]
+            with st.expander(f"{label}s: {len(layer['included'])} included, {len(layer['unmatched'])} unmatched"):
+                st.write(f"{label}s Included:")
+                st.dataframe(layer['included'][columns])
+                st.download_button(
+                    label=f"Download Included {label} List to Verify",
+                    data=layer['included'][columns].to_csv(index=False).encode('utf-8'),
+                    file_name=f"{label}_List_to_Verify.csv",
+                    mime="text/csv",
+                    key=f'download-csv-{entity}'
+                )
+
+                if not layer['invalid'].empty:
+                    st.warning(f"{len(layer['invalid'])} {label}s have a blank or invalid {columns[1]} and could not be matched. They are listed as unmatched below.")
+                if not layer['unmatched'].empty:
+                    st.write(f"{label}s unmatched:")
+                    st.dataframe(layer['unmatched'][columns])
+                    st.download_button(
+                        label=f"Download Unmatched {label} List",
+                        data=layer['unmatched'][columns].to_csv(index=False).encode('utf-8'),
+                        file_name=f"Unmatched_{label}_List.csv",
+                        mime="text/csv",
+                        key=f'download-csv-unmatched-{entity}'
+                    )
+
+    st.divider()
+
+    show_lists(layers)
+
+    st.divider()
+
+    # Map and map download, rerun on their own when the map is clicked or downloaded
+    @display.fragment
+    def show_map_section(maps):
+        st_data = display.show_map(maps, map_events, key='combined-map')
+        if st_data and st_data.get('last_object_clicked_tooltip'):
+            st.caption(st_data['last_object_clicked_tooltip'])
+
+        # Offer the map for download as HTML
+        st.download_button(
+            label="Download Map as HTML",
+            data=maps['html'],
+            file_name="Combined_Map.html",
+            mime="text/html",
+            type="primary"
+        )
+
+    show_map_section(maps)
+
+# Stage timings of this run, when the performance panel is on
+display.perf_panel(spans)
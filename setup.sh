@@ -7,3 +7,13 @@ enableCORS = false\n\
 headless = true\n\
 \n\
 " >> ~/.streamlit/config.toml
+
+# Compile the state pack every page loads its reference data from, which is not
+# committed, when the deploy has none or its source files changed since it was built.
+# Without it the pages read the source files, more slowly.
+python -m mtss_maps.statepack --check || python -m mtss_maps.statepack || echo "The state pack could not be built; the pages read the source files instead."
+
+# Cut the District and ISD vector tiles the app serves from static/tiles, which are
+# not committed, on the first start of a deploy. Without them the maps still work,
+# only the vector tile view is not offered.
+python -m mtss_maps.tiles --missing || echo "Vector tiles could not be built; the vector tile map is turned off."
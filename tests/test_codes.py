@@ -0,0 +1,76 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import pandas as pd
+import pytest
+
+from mtss_maps import codes
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+def keys_of(values):
+    keys, valid = codes.code_keys(pd.Series(values, dtype=object))
+    return keys.tolist(), valid.tolist()
+
+#------------------------------------------------------------------------
+# Tests
+#------------------------------------------------------------------------
+
+# Every way a spreadsheet writes code 123 gets the same key
+def test_numeric_codes_share_a_key_whatever_their_format():
+    keys, valid = keys_of([123, 123.0, '123', '00123', '123.0', ' 00123 ', '="00123"', "'00123", '1.23e2'])
+    assert keys == [123] * 9
+    assert all(valid)
+
+def test_thousands_separators_are_removed():
+    keys, _ = keys_of(['1,234', '12,345'])
+    assert keys == [1234, 12345]
+
+def test_codes_are_padded_back_with_leading_zeros():
+    keys, _ = codes.code_keys(pd.Series(['123', '00123', '82921'], dtype=object))
+    assert codes.format_codes(keys).tolist() == ['00123', '00123', '82921']
+
+def test_alphanumeric_codes_get_negative_keys_ignoring_case():
+    keys, valid = keys_of(['64M000009', '64m000009', 'CCRESA-EC', 'ccresa-ec', 'CCRESA-EI'])
+    assert all(valid)
+    assert all(key < 0 for key in keys)
+    assert keys[0] == keys[1]
+    assert keys[2] == keys[3]
+    assert len({keys[0], keys[2], keys[4]}) == 3
+
+# Text that is not a code, blanks and numbers that cannot be codes have no key
+@pytest.mark.parametrize('value', ['TBD', 'NA', 'n/a', 'School', '', '   ', None, float('nan'), '12.5', -3, '-3'])
+def test_junk_codes_are_invalid(value):
+    keys, valid = keys_of([value])
+    assert keys == [pd.NA]
+    assert valid == [False]
+
+def test_codes_over_the_key_range_are_invalid():
+    keys, valid = keys_of([codes.MAX_CODE, codes.MAX_CODE + 1])
+    assert keys == [codes.MAX_CODE, pd.NA]
+    assert valid == [True, False]
+
+# normalize_codes keys a frame in place, keeping alphanumeric and invalid codes as given
+def test_normalize_codes_rewrites_the_code_column():
+    df = pd.DataFrame({'Code': ['123', '64M000009', 'TBD', None]}, dtype=object)
+    valid = codes.normalize_codes(df, 'Code')
+    assert valid.tolist() == [True, True, False, False]
+    assert df[codes.KEY].iloc[0] == 123
+    assert df['Code'].iloc[:3].tolist() == ['00123', '64M000009', 'TBD']
+    assert df['Code'].iloc[3] is pd.NA
+
+def test_check_keys_accepts_the_same_code_written_differently():
+    values = pd.Series(['64M000009', '64m000009', " '64M000009'", '00123'], dtype=object)
+    keys, _ = codes.code_keys(values)
+    codes.check_keys(values, keys, 'codes.csv')
+
+# X5908649 and X8606006 have the same CRC32 checksum key
+def test_check_keys_refuses_colliding_codes():
+    values = pd.Series(['X5908649', 'X8606006'], dtype=object)
+    keys, _ = codes.code_keys(values)
+    assert keys[0] == keys[1]
+    with pytest.raises(ValueError, match='X5908649, X8606006'):
+        codes.check_keys(values, keys, 'codes.csv')
@@ -0,0 +1,78 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import numpy as np
+import pandas as pd
+
+from mtss_maps import fuzzy
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+NAMES = ['Adams Township School District', 'Addison Community Schools', 'Baker Elementary', 'Carver Academy']
+
+def trigram_index(names=NAMES):
+    return fuzzy.TrigramIndex(pd.Series(names), pd.Series([f'{i:05d}' for i in range(len(names))]))
+
+# Dice coefficient of two names, computed directly from their trigram sets
+def dice(a, b):
+    a, b = (fuzzy._trigrams(name) for name in fuzzy.normalize_names([a, b]))
+    return 2 * len(a & b) / (len(a) + len(b))
+
+#------------------------------------------------------------------------
+# Tests
+#------------------------------------------------------------------------
+
+def test_normalize_names_lowercases_and_collapses_punctuation():
+    assert fuzzy.normalize_names(['  St. Mary-Of The Lake  ', None]).tolist() == ['st mary of the lake', '']
+
+def test_misspelled_names_suggest_the_right_name_first():
+    suggestions = trigram_index().search(pd.Series(['Adams Twp Schol District', 'Carver Acadmy']))
+    best = suggestions[suggestions['rank'] == 1].set_index('query')
+    assert best.loc[0, 'name'] == 'Adams Township School District'
+    assert best.loc[1, 'name'] == 'Carver Academy'
+    assert best.loc[1, 'code'] == '00003'
+
+def test_an_exact_name_scores_one():
+    suggestions = trigram_index().search(pd.Series(['baker elementary']))
+    assert suggestions.loc[0, 'name'] == 'Baker Elementary'
+    assert suggestions.loc[0, 'score'] == 1
+
+def test_suggestions_are_ranked_top_k_above_the_minimum_score():
+    suggestions = trigram_index().search(pd.Series(['Adams Schools']), k=2, min_score=0)
+    assert suggestions['rank'].tolist() == [1, 2]
+    assert suggestions['score'].is_monotonic_decreasing
+
+    # Nothing is close to a name sharing no trigram
+    assert trigram_index().search(pd.Series(['Zzyzx'])).empty
+
+# Scores are the Dice coefficients of the trigram sets, whichever path counts the shared trigrams
+def test_scores_match_the_dice_coefficient_on_common_and_rare_trigrams():
+    names = [f'Lincoln School {i}' for i in range(fuzzy.DENSE_POSTINGS + 10)] + ['Washington Academy']
+    index = trigram_index(names)
+    assert len(index._dense) > 0
+
+    queries = ['Lincoln Schol 12', 'Washingtn Academy']
+    suggestions = index.search(pd.Series(queries), k=3, min_score=0)
+    for row in suggestions.itertuples():
+        assert np.isclose(row.score, dice(queries[row.query], row.name))
+    assert suggestions.loc[suggestions['query'] == 1, 'name'].iloc[0] == 'Washington Academy'
+
+# Searching in small batches gives the same suggestions as one batch
+def test_batches_do_not_change_the_suggestions(monkeypatch):
+    queries = pd.Series(['Adams', 'Addison', 'Baker', 'Carver', 'Acadmy'])
+    whole = trigram_index().search(queries)
+    monkeypatch.setattr(fuzzy, 'MAX_BATCH_CELLS', len(NAMES) * 2)
+    pd.testing.assert_frame_equal(trigram_index().search(queries), whole)
+
+# Suggestions for a shipped code table, each distinct uploaded name searched once
+def test_suggest_matches_for_district_names():
+    names = pd.Series(['Adams Township Schol District', 'Adams Township Schol District', None])
+    suggestions = fuzzy.suggest_matches('district', names)
+    assert list(suggestions.columns) == ['Uploaded District', 'Suggestion', 'District Code', 'Similarity']
+    assert suggestions['Uploaded District'].unique().tolist() == ['Adams Township Schol District']
+    assert suggestions.iloc[0]['Suggestion'] == 'Adams Township School District'
+    assert suggestions.iloc[0]['District Code'] == '31020'
+    assert len(suggestions) <= fuzzy.TOP_K
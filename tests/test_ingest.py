@@ -0,0 +1,110 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import io
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from mtss_maps import ingest, reference
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+CSV = (
+    'District,District Code,Notes,Enrollment,Empty,Score\n'
+    'Adams,01010,big,120,,3.5\n'
+    'Baker,02010,small,80,,\n'
+    'Carver,03010,,95,,4\n'
+)
+
+def csv_upload(text=CSV):
+    return io.BytesIO(text.encode())
+
+# Workbook upload with a header row (None for unnamed columns) and data rows
+def xlsx_upload(rows):
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    data = io.BytesIO()
+    workbook.save(data)
+    data.seek(0)
+    return data
+
+XLSX_ROWS = [
+    ['District', 'District Code', 'Notes', 'Enrollment', None, 'Flag'],
+    ['Adams', 1010, 'big', 120, None, True],
+    ['Baker', '02010', 'small', 80.5, None, False],
+    [None, None, None, None, None, None],
+    ['Carver', 3010.0, None, None, None, None],
+]
+
+#------------------------------------------------------------------------
+# Tests
+#------------------------------------------------------------------------
+
+def test_read_headers_of_csv_and_xlsx():
+    assert ingest.read_headers(csv_upload(), 'data.csv') == [(None, ['District', 'District Code', 'Notes', 'Enrollment', 'Empty', 'Score'])]
+    assert ingest.read_headers(xlsx_upload(XLSX_ROWS), 'data.xlsx') == [('Sheet', ['District', 'District Code', 'Notes', 'Enrollment', 'Unnamed: 4', 'Flag'])]
+
+def test_other_file_types_are_refused():
+    with pytest.raises(ValueError, match='Unsupported file format'):
+        ingest.read_headers(csv_upload(), 'data.txt')
+
+def test_csv_reads_only_the_asked_columns_with_text_kept_as_text():
+    df = ingest.read_columns(csv_upload(), 'data.csv', ['District', 'District Code'], text_columns=['District Code'])
+    assert list(df.columns) == ['District', 'District Code']
+    assert df['District Code'].tolist() == ['01010', '02010', '03010']
+
+# Numeric columns holding at least one number are kept; text and empty columns are not
+def test_csv_keeps_the_numeric_columns_with_values():
+    df = ingest.read_columns(csv_upload(), 'data.csv', ['District', 'District Code'], text_columns=['District Code'], numeric=True)
+    assert list(df.columns) == ['District', 'District Code', 'Enrollment', 'Score']
+    assert df['Enrollment'].tolist() == [120, 80, 95]
+    assert df['Score'].isna().tolist() == [False, True, False]
+
+# A column that turns to text after the sampled rows is dropped as the chunks stream by
+def test_csv_drops_a_column_that_turns_to_text_in_a_later_chunk(monkeypatch):
+    monkeypatch.setattr(ingest, 'SAMPLE_ROWS', 2)
+    monkeypatch.setattr(ingest, 'CHUNK_ROWS', 2)
+    text = 'District,District Code,Value,Later\n' + ''.join(f'D{i},{i},{i},{i if i < 3 else "unknown"}\n' for i in range(6))
+    df = ingest.read_columns(csv_upload(text), 'data.csv', ['District', 'District Code'], numeric=True)
+    assert list(df.columns) == ['District', 'District Code', 'Value']
+    assert len(df) == 6
+
+def test_xlsx_reads_text_columns_like_pandas_and_skips_blank_rows():
+    df = ingest.read_columns(xlsx_upload(XLSX_ROWS), 'data.xlsx', ['District', 'District Code'], text_columns=['District Code'])
+    assert list(df.columns) == ['District', 'District Code']
+    assert df['District Code'].tolist() == ['1010', '02010', '3010']
+
+# Booleans and text are not numbers; a column without any value, such as an unnamed one, is dropped
+def test_xlsx_keeps_the_numeric_columns_with_values():
+    df = ingest.read_columns(xlsx_upload(XLSX_ROWS), 'data.xlsx', ['District', 'District Code'], text_columns=['District Code'], numeric=True)
+    assert list(df.columns) == ['District', 'District Code', 'Enrollment']
+    assert df['Enrollment'].tolist()[:2] == [120, 80.5]
+    assert pd.isna(df['Enrollment'].iloc[2])
+
+def test_example_workbook_has_no_empty_value_columns():
+    path = reference.ROOT / 'examples' / 'PSA_Data.xlsx'
+    df = ingest.read_columns(path, path.name, ['PSA', 'PSA Code'], text_columns=['PSA Code'], numeric=True)
+    assert list(df.columns) == ['PSA', 'PSA Code']
+
+@pytest.mark.parametrize('filename, upload', [('data.csv', csv_upload), ('data.xlsx', lambda: xlsx_upload(XLSX_ROWS))])
+def test_uploads_over_the_row_limit_are_refused(monkeypatch, filename, upload):
+    monkeypatch.setattr(ingest, 'MAX_ROWS', 2)
+    with pytest.raises(ingest.UploadTooLarge, match='more than 2 rows'):
+        ingest.read_columns(upload(), filename, ['District'])
+
+def test_uploads_over_the_size_limit_are_refused(monkeypatch):
+    monkeypatch.setattr(ingest, 'MAX_MEGABYTES', 0)
+    with pytest.raises(ingest.UploadTooLarge, match='larger than 0 MB'):
+        ingest.read_headers(csv_upload(), 'data.csv')
+    with pytest.raises(ingest.UploadTooLarge):
+        ingest.read_columns(csv_upload(), 'data.csv', ['District'])
+
+# UploadTooLarge is reported by the pages like any other bad upload
+def test_upload_too_large_is_a_value_error():
+    assert issubclass(ingest.UploadTooLarge, ValueError)
@@ -0,0 +1,54 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import pandas as pd
+
+from mtss_maps import matching
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+def name_index():
+    names = pd.Series(['Adams', 'Baker', 'Carver', 'Baker', 'Adams', None])
+    codes = pd.Series(['001', '002', '003', '004', '001', '005'])
+    return matching.NameIndex(names, codes)
+
+#------------------------------------------------------------------------
+# Tests
+#------------------------------------------------------------------------
+
+def test_lookup_finds_exact_names_and_keeps_the_upload_index():
+    names = pd.Series(['Carver', 'Adams'], index=[10, 20])
+    found = name_index().lookup(names)
+    assert found.tolist() == ['003', '001']
+    assert found.index.tolist() == [10, 20]
+
+# Names are matched exactly: other case, extra spaces and unknown names find nothing
+def test_lookup_returns_none_for_names_not_in_the_table():
+    found = name_index().lookup(pd.Series(['adams', 'Adams ', 'Zeeland', None]))
+    assert found.tolist() == [None, None, None, None]
+
+# A name listed twice resolves to its first row, as a scan of the table would
+def test_lookup_uses_the_first_code_of_a_repeated_name():
+    assert name_index().lookup(pd.Series(['Baker'])).tolist() == ['002']
+
+# Only names with more than one distinct code are ambiguous
+def test_ambiguous_in_lists_every_code_of_the_uploaded_ambiguous_names():
+    index = name_index()
+    assert index.ambiguous.index.tolist() == ['Baker']
+
+    ambiguous = index.ambiguous_in(pd.Series(['Adams', 'Baker', 'Baker']))
+    assert ambiguous.to_dict('records') == [{'Name': 'Baker', 'Code Used': '002', 'All Codes': '002, 004'}]
+
+def test_ambiguous_in_is_empty_when_no_uploaded_name_is_ambiguous():
+    ambiguous = name_index().ambiguous_in(pd.Series(['Adams', 'Carver']))
+    assert ambiguous.empty
+    assert list(ambiguous.columns) == ['Name', 'Code Used', 'All Codes']
+
+# The index of a shipped code table resolves its names to their codes
+def test_district_name_index():
+    index = matching.load_name_index('district')
+    found = index.lookup(pd.Series(['Adams Township School District', 'Academy of Warren', 'Nowhere Schools']))
+    assert [str(code) if code is not None else None for code in found] == ['31020', '50911', None]
@@ -0,0 +1,66 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import pandas as pd
+
+from mtss_maps import search
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+def search_index():
+    return search.SearchIndex({
+        'District': (pd.Series(['Lincoln Park Public Schools', 'Adams Township School District', 'Lincoln Consolidated Schools']), pd.Series([82090, 31020, 81070])),
+        'School': (pd.Series(['Lincoln Park Public Schools', 'Lincoln Elementary', 'Lincoln Elementary', 'Adams Elementary']), pd.Series(['0123', '4567', '4567', '64M000009'])),
+    })
+
+def names(results):
+    return results['Name'].tolist()
+
+#------------------------------------------------------------------------
+# Tests
+#------------------------------------------------------------------------
+
+# Exact names first, then whole-name prefixes, then names whose words start with the search words
+def test_results_are_ranked_by_how_the_name_matches():
+    results = search_index().search('lincoln park public schools')
+    assert names(results) == ['Lincoln Park Public Schools'] * 2
+
+    results = search_index().search('Lincoln')
+    assert set(names(results)) == {'Lincoln Park Public Schools', 'Lincoln Elementary', 'Lincoln Consolidated Schools'}
+    assert names(search_index().search('park lin')) == ['Lincoln Park Public Schools'] * 2
+
+def test_search_words_match_word_prefixes_in_any_order():
+    assert names(search_index().search('school adams')) == ['Adams Township School District']
+    assert names(search_index().search('elem ada')) == ['Adams Elementary']
+
+# Rows repeated in a code table are listed once
+def test_repeated_rows_are_listed_once():
+    results = search_index().search('Lincoln Elementary')
+    assert results.to_dict('records') == [{'Type': 'School', 'Name': 'Lincoln Elementary', 'Code': '4567'}]
+
+def test_codes_match_by_prefix_ignoring_leading_zeros():
+    assert names(search_index().search('31020')) == ['Adams Township School District']
+    assert names(search_index().search('0031')) == ['Adams Township School District']
+    assert names(search_index().search('123')) == ['Lincoln Park Public Schools']
+    assert names(search_index().search('64m')) == ['Adams Elementary']
+
+# On ties the preferred entity type comes first; without a preference, shorter names and then names first
+def test_prefer_puts_an_entity_type_first_on_ties():
+    assert search_index().search('Lincoln Park', prefer='School')['Type'].tolist() == ['School', 'District']
+    assert search_index().search('Lincoln Park', prefer='District')['Type'].tolist() == ['District', 'School']
+
+# A preference never ranks a weaker match above a stronger one
+def test_prefer_does_not_outrank_a_better_match():
+    index = search.SearchIndex({
+        'District': (pd.Series(['Lincoln Elementary District']), pd.Series([1])),
+        'School': (pd.Series(['Lincoln Elementary']), pd.Series([2])),
+    })
+    assert index.search('Lincoln Elementary', prefer='District')['Type'].tolist() == ['School', 'District']
+
+def test_limit_and_empty_searches():
+    assert len(search_index().search('Lincoln', limit=2)) == 2
+    assert search_index().search('   ').empty
+    assert search_index().search('Zeeland').empty
@@ -0,0 +1,118 @@
+#------------------------------------------------------------------------
+# Import Modules
+#------------------------------------------------------------------------
+
+import json
+
+import numpy as np
+import pytest
+import shapely
+
+from mtss_maps import topology
+
+#------------------------------------------------------------------------
+# Functions
+#------------------------------------------------------------------------
+
+# Polygons back from a TopoJSON payload, as a browser's topojson.feature would decode them
+def decode(payload):
+    scale = np.array(payload['transform']['scale'])
+    translate = np.array(payload['transform']['translate'])
+    arcs = [np.cumsum(np.array(arc), axis=0) * scale + translate for arc in payload['arcs']]
+
+    def ring(references):
+        points = []
+        for reference in references:
+            arc = arcs[reference] if reference >= 0 else arcs[~reference][::-1]
+            points.extend(arc if not points else arc[1:])
+        return points
+
+    def polygon(rings):
+        return shapely.Polygon(ring(rings[0]), [ring(hole) for hole in rings[1:]])
+
+    shapes = []
+    for geometry in payload['objects'][topology.OBJECT]['geometries']:
+        if geometry['type'] == 'Polygon':
+            shapes.append(polygon(geometry['arcs']))
+        elif geometry['type'] == 'MultiPolygon':
+            shapes.append(shapely.MultiPolygon([polygon(rings) for rings in geometry['arcs']]))
+        else:
+            shapes.append(None)
+    return shapes
+
+# Two squares sharing a side, a square with a hole and a two-part polygon
+GEOMETRIES = np.array([
+    shapely.box(-85.0, 42.0, -84.9, 42.1),
+    shapely.box(-84.9, 42.0, -84.8, 42.1),
+    shapely.Polygon([(-84.7, 42.0), (-84.5, 42.0), (-84.5, 42.2), (-84.7, 42.2)], [[(-84.65, 42.05), (-84.55, 42.05), (-84.55, 42.15), (-84.65, 42.15)]]),
+    shapely.MultiPolygon([shapely.box(-84.4, 42.0, -84.3, 42.1), shapely.box(-84.2, 42.0, -84.1, 42.1)]),
+], dtype=object)
+
+def encode_all(topo):
+    return topo.encode(range(len(topo.geometries)), [{'row': row} for row in range(len(topo.geometries))])
+
+#------------------------------------------------------------------------
+# Tests
+#------------------------------------------------------------------------
+
+def test_round_trip_gives_back_the_polygons():
+    topo = topology.Topology(GEOMETRIES, precision=5)
+    payload = json.loads(json.dumps(encode_all(topo)))
+    decoded = decode(payload)
+
+    assert [geometry['type'] for geometry in payload['objects'][topology.OBJECT]['geometries']] == ['Polygon', 'Polygon', 'Polygon', 'MultiPolygon']
+    for source, shape in zip(GEOMETRIES, decoded):
+        assert shape.is_valid
+        assert shapely.equals_exact(shapely.normalize(source), shapely.normalize(shape), tolerance=1e-5)
+
+# The side shared by the two squares is one arc, referenced forwards by one and backwards by the other
+def test_shared_borders_are_stored_once():
+    topo = topology.Topology(GEOMETRIES[:2], precision=5)
+    first, second = (set(geometry['arcs'][0]) for geometry in topo.geometries)
+    shared = [arc for arc in first if ~arc in second]
+    assert len(shared) == 1
+    assert len(topo.arcs) == 3
+
+# Arcs are delta-encoded integers: every step after the first is a small integer offset
+def test_arcs_are_quantized_and_delta_encoded():
+    topo = topology.Topology(GEOMETRIES, precision=3)
+    assert topo.transform['scale'] == [0.001, 0.001]
+    for arc in topo.arcs:
+        assert all(isinstance(value, int) for point in arc for value in point)
+        assert all(abs(x) <= 300 and abs(y) <= 300 for x, y in arc[1:])
+
+def test_properties_and_rows_without_geometry():
+    topo = topology.Topology(GEOMETRIES, precision=5)
+    payload = topo.encode([1, -1], [{'name': 'B'}, {'name': 'missing'}])
+    geometries = payload['objects'][topology.OBJECT]['geometries']
+    assert geometries[0]['properties'] == {'name': 'B'}
+    assert geometries[0]['arcs'] == topo.geometries[1]['arcs']
+    assert geometries[1] == {'type': None, 'properties': {'name': 'missing'}}
+
+# A polygon smaller than the precision collapses and is left out
+def test_polygons_collapsing_at_the_precision_are_left_out():
+    tiny = np.array([shapely.box(-85.0, 42.0, -84.9, 42.1), shapely.box(-84.0, 42.0, -83.99999, 42.00001)], dtype=object)
+    topo = topology.Topology(tiny, precision=3)
+    assert topo.geometries[1] == {'type': None}
+
+# At eight decimal places a layer 50 degrees wide has x steps past 32 bits, which must not merge points
+def test_fine_precision_does_not_merge_distinct_points():
+    wide = np.array([shapely.box(-135.0, 42.0, -110.0, 43.0), shapely.box(-110.0, 42.0, -85.0, 43.0)], dtype=object)
+    topo = topology.Topology(wide, precision=topology.MAX_PRECISION)
+    for source, shape in zip(wide, decode(encode_all(topo))):
+        assert shapely.equals_exact(shapely.normalize(source), shapely.normalize(shape), tolerance=1e-8)
+
+def test_layers_too_large_for_the_precision_are_refused():
+    world = np.array([shapely.box(-180.0, -90.0, 180.0, 90.0)], dtype=object)
+    with pytest.raises(ValueError, match='too large'):
+        topology.Topology(world, precision=topology.MAX_PRECISION)
+
+# The ISD boundaries decode to their simplified polygons within the rounding of the coordinates
+def test_isd_topology_round_trip():
+    from mtss_maps import simplify
+
+    topo = topology.load_topology('isd', 'fine', 5)
+    source = simplify.load_level('isd', 'fine').geometry.values.to_numpy()
+    decoded = decode(encode_all(topo))
+    assert all(shape.is_valid for shape in decoded)
+    assert max(shapely.hausdorff_distance(a, b) for a, b in zip(source, decoded)) < 1e-5